@@ -7,6 +7,14 @@ import tempfile
 import subprocess
 import shutil
 import random
+import time
+import argparse
+import threading
+import hashlib
+import bisect
+import heapq
+from collections import deque, OrderedDict
+from itertools import accumulate
 from datetime import timedelta
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter, QMessageBox,
@@ -17,11 +25,13 @@ from PyQt6.QtWidgets import (
     QDoubleSpinBox, QColorDialog, QCheckBox, QGroupBox, QScrollArea, QRadioButton,
     QButtonGroup, QTabWidget, QTextEdit, QGraphicsItem, QGraphicsPathItem, QGraphicsTextItem
 )
-from PyQt6.QtCore import Qt, QTimer, QPoint, QRectF, QSize, pyqtSignal, QObject, QThread, QPointF
+from PyQt6.QtCore import (
+    Qt, QTimer, QPoint, QRectF, QSize, pyqtSignal, QObject, QThread, QPointF, QLineF, QT_VERSION_STR, QEvent
+)
 from PyQt6.QtGui import (
     QPixmap, QImage, QPainter, QPen, QColor, QIcon, QAction, 
     QBrush, QPalette, QCursor, QKeySequence, QFont, QPainterPath, QTransform,
-    QFontMetrics, QLinearGradient, QRadialGradient, QConicalGradient
+    QFontMetrics, QLinearGradient, QRadialGradient, QConicalGradient, QPolygonF, QStaticText
 )
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 
@@ -35,6 +45,444 @@ SUPPORTED_IMAGE_FORMATS = ["png", "jpg", "jpeg", "bmp", "tiff", "webp"]
 TRACK_HEIGHT = 60
 TIMELINE_SCALE = 10  # pixels per second
 MAX_TRACKS = 10
+RULER_HEIGHT = 20  # ruler band above the tracks
+TRACK_LABEL_WIDTH = 90  # track name column left of the tracks
+RULER_INTERVALS = [0.1, 0.2, 0.5, 1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600]  # seconds
+RULER_TICK_SPACING = 10  # minimum pixels between grid lines
+RULER_LABEL_SPACING = 50  # minimum pixels between ruler labels
+TIMELINE_ZOOM_STEP = 1.25  # zoom factor per wheel notch / zoom action
+TIMELINE_MAX_FRAME_PIXELS = 24  # fully zoomed in, one frame spans this many pixels
+TIMELINE_END_PADDING = 30  # seconds of empty timeline kept after the last clip
+CLIP_LABEL_MIN_PIXELS = 40  # clips narrower than this on screen drop their label
+CLIP_LABEL_WIDTH_STEP = 16  # elided clip labels are laid out for widths in these steps
+CLIP_LABEL_CACHE_ITEMS = 2000  # laid-out clip labels kept per timeline
+CLIP_HANDLE_PIXELS = 8  # on-screen width of the resize handles
+CLIP_DETAIL_MIN_PIXELS = 24  # clips narrower than this on screen drop thumbnails and waveforms
+TIMELINE_ITEM_POOL = 256  # spare clip items kept for reuse as the timeline scrolls
+TIMELINE_ITEM_WINDOW_VIEWS = 5  # the item window is recomputed once it spans more view widths than this
+TIMELINE_MIN_ITEM_PIXELS = 2  # narrower clips get no item and are painted with the background
+SNAP_PIXELS = 8  # dragged clip edges snap to edges, markers and the playhead this close on screen
+PREFETCH_FRAMES = 16  # decoded frames buffered ahead of playback
+SHUTTLE_SPEEDS = [1, 2, 4, 8]  # J/K/L shuttle speeds
+KEYFRAME_SHUTTLE_SPEED = 8  # from this forward shuttle speed on, only keyframes are decoded
+FRAME_CACHE_BUDGET = 512 * 1024 * 1024  # bytes of decoded frames kept for scrubbing
+SCRUB_PREFETCH_RADIUS = 12  # frames decoded on each side of the playhead
+REVERSE_SEGMENT_FRAMES = 60  # reverse playback decodes at most this many frames per forward pass
+STEP_PREFETCH_WAIT = 2.0  # seconds before a backward frame step asks the prefetcher again
+STEP_PREFETCH_TRIES = 3  # requests before a backward step gives up on a frame that won't decode
+PREVIEW_SCALES = {"Full": 1.0, "1/2": 0.5, "1/4": 0.25}  # preview resolutions besides Auto
+LOWRES_FOURCCS = {"MJPG", "FMP4", "XVID", "DIVX", "DX50", "MP4V", "MPG1", "MPG2"}  # FFmpeg -lowres capable
+PROXY_HEIGHT = 540  # proxy media resolution
+PROXY_MIN_SOURCE_HEIGHT = 1080  # only sources taller than this get proxies
+THUMBNAIL_HEIGHT = 72  # filmstrip thumbnails are extracted (and cached on disk) at this height
+THUMBNAIL_WORKERS = 2  # background threads extracting filmstrip thumbnails
+THUMBNAIL_MEMORY_ITEMS = 2000  # filmstrip thumbnails kept in memory
+WAVEFORM_SAMPLE_RATE = 16000  # audio is decoded to mono at this rate for waveform peaks
+WAVEFORM_BLOCK = 64  # samples per peak at the finest waveform level
+WAVEFORM_LEVEL_FACTOR = 4  # each coarser waveform level merges this many peaks
+RENDER_CHUNK_SECONDS = 2  # rendered previews are cached per chunk of the timeline
+RENDER_CACHE_BUDGET = 2 * 1024 * 1024 * 1024  # bytes of rendered chunks kept on disk
+TIMING_WINDOW = 600  # most recent samples kept per player timing stage
+TIMING_HISTOGRAM_EDGES_MS = [0, 1, 2, 4, 8, 12, 16, 24, 33, 50, 66, 100, 200, 500]
+PYCUT_DATA_DIR = os.path.join(os.path.expanduser("~"), ".pycut")
+CALIBRATION_FILE = os.path.join(PYCUT_DATA_DIR, "calibration.json")
+PYCUT_CACHE_DIR = os.path.join(PYCUT_DATA_DIR, "cache")
+RENDER_CACHE_DIR = os.path.join(PYCUT_CACHE_DIR, "renders")
+AUTOSAVE_DIR = os.path.join(PYCUT_DATA_DIR, "autosave")
+AUTOSAVE_DELAY_MS = 10000  # the project is autosaved this long after the last edit
+UNDO_LIMIT = 100  # undo steps kept
+BENCHMARK_TIMELINE_SIZES = [1000, 10000, 50000]  # clip counts of the timeline benchmark
+
+def format_bytes(num_bytes):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+def media_cache_path(path, suffix):
+    # Sidecar cache file for a media file; invalidated when the media changes
+    try:
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    except OSError:
+        key = os.path.abspath(path)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(PYCUT_CACHE_DIR, digest + suffix)
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+class ClipStore:
+    # The project's clip dicts by id, plus a per-track time index. Each track
+    # keeps its clips sorted by start with a running maximum of their ends, so
+    # "active at t" and "overlapping a range" are a bisect and a short walk back.
+    # Edits only mark a track stale; it is re-sorted on its next query. Call
+    # update() after changing a clip's start, duration or track in place.
+    # The preview renderer queries from its own thread: edits and index
+    # rebuilds hold the lock, built indexes are never modified (queries walk
+    # them freely) and iteration walks a snapshot.
+    def __init__(self, clips=()):
+        self.lock = threading.RLock()
+        self.by_id = {}  # clip id -> clip, in insertion order
+        self.track_members = {}  # track -> {clip id: clip}
+        self.indexed_track = {}  # clip id -> track it is filed under
+        self.indexes = {}  # track -> (starts, clips, running max end); missing when stale
+        for clip in clips:
+            self.add(clip)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.by_id.values()))
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, clip_id):
+        return clip_id in self.by_id
+
+    def get(self, clip_id):
+        return self.by_id.get(clip_id)
+
+    def add(self, clip):
+        with self.lock:
+            self.by_id[clip['id']] = clip
+            self.file(clip)
+
+    def remove(self, clip_id):
+        with self.lock:
+            clip = self.by_id.pop(clip_id, None)
+            if clip is not None:
+                track = self.indexed_track.pop(clip_id)
+                del self.track_members[track][clip_id]
+                self.indexes.pop(track, None)
+            return clip
+
+    def update(self, clip):
+        with self.lock:
+            track = self.indexed_track.get(clip['id'])
+            if track != clip['track']:
+                del self.track_members[track][clip['id']]
+                self.indexes.pop(track, None)
+            self.file(clip)
+
+    def file(self, clip):
+        track = clip['track']
+        self.track_members.setdefault(track, {})[clip['id']] = clip
+        self.indexed_track[clip['id']] = track
+        self.indexes.pop(track, None)
+
+    def index(self, track):
+        with self.lock:
+            index = self.indexes.get(track)
+            if index is None:
+                clips = sorted(self.track_members.get(track, {}).values(), key=lambda clip: clip['start'])
+                starts = [clip['start'] for clip in clips]
+                ends = list(accumulate((clip['start'] + clip['duration'] for clip in clips), max))
+                index = self.indexes[track] = (starts, clips, ends)
+            return index
+
+    def tracks(self, track=None):
+        with self.lock:
+            return sorted(self.track_members) if track is None else [track]
+
+    def overlapping(self, start, end, track=None):
+        # Clips intersecting [start, end), by track then start
+        result = []
+        for track in self.tracks(track):
+            starts, clips, ends = self.index(track)
+            i = bisect.bisect_left(starts, end)
+            found = []
+            while i > 0 and ends[i - 1] > start:
+                i -= 1
+                clip = clips[i]
+                if clip['start'] + clip['duration'] > start:
+                    found.append(clip)
+            result.extend(reversed(found))
+        return result
+
+    def active(self, t, track=None):
+        # Clips with start <= t < end, by track then start
+        result = []
+        for track in self.tracks(track):
+            starts, clips, ends = self.index(track)
+            i = bisect.bisect_right(starts, t)
+            found = []
+            while i > 0 and ends[i - 1] > t:
+                i -= 1
+                clip = clips[i]
+                if clip['start'] + clip['duration'] > t:
+                    found.append(clip)
+            result.extend(reversed(found))
+        return result
+
+    def end_time(self):
+        with self.lock:
+            return max((self.index(track)[2][-1] for track in self.track_members if self.track_members[track]),
+                       default=0)
+
+    def in_time_order(self):
+        # All clips by start, ties by track
+        with self.lock:
+            return list(heapq.merge(*(self.index(track)[1] for track in self.tracks()),
+                                    key=lambda clip: clip['start']))
+
+class SnapIndex:
+    # Sorted (time, key) edges that dragged clips snap to: the start and end of
+    # every clip (key = clip id) and the markers (key = MARKER). Moving a clip
+    # replaces its two entries in place, so the index is never rebuilt.
+    MARKER = -1
+
+    def __init__(self):
+        self.edges = []
+        self.clip_edges = {}  # clip id -> (start, end) as filed
+
+    def set_clip(self, clip_id, start, end):
+        if self.clip_edges.get(clip_id) == (start, end):
+            return
+        self.remove_clip(clip_id)
+        self.clip_edges[clip_id] = (start, end)
+        bisect.insort(self.edges, (start, clip_id))
+        bisect.insort(self.edges, (end, clip_id))
+
+    def remove_clip(self, clip_id):
+        for t in self.clip_edges.pop(clip_id, ()):
+            self.discard((t, clip_id))
+
+    def add_marker(self, t):
+        bisect.insort(self.edges, (t, self.MARKER))
+
+    def remove_marker(self, t):
+        self.discard((t, self.MARKER))
+
+    def discard(self, entry):
+        i = bisect.bisect_left(self.edges, entry)
+        if i < len(self.edges) and self.edges[i] == entry:
+            del self.edges[i]
+
+    def nearest(self, t, tolerance, exclude=()):
+        # Closest edge within tolerance of t, skipping the clips in exclude
+        edges = self.edges
+        i = bisect.bisect_left(edges, (t,))
+        best = None
+        j = i
+        while j < len(edges) and edges[j][0] - t <= tolerance:
+            if edges[j][1] not in exclude:
+                best = edges[j][0]
+                break
+            j += 1
+        j = i - 1
+        while j >= 0 and t - edges[j][0] <= tolerance:
+            if edges[j][1] not in exclude:
+                if best is None or t - edges[j][0] < best - t:
+                    best = edges[j][0]
+                break
+            j -= 1
+        return best
+
+class ExportEstimator:
+    # Per-machine cost model. Render cost is expressed in seconds per megapixel
+    # of encoded output; effects and clip types scale that base cost.
+    DEFAULT_TABLE = {
+        "encode_s_per_mpx": 0.004,
+        "type_cost": {
+            "video": 1.4,  # decode + encode
+            "image": 1.0,
+            "text": 2.0,  # background pass + overlay pass
+            "sticker": 2.0,
+            "transition": 1.0
+        },
+        "effect_cost": {
+            "fade": 0.05,
+            "scale": 0.15,
+            "rotation": 0.6,
+            "opacity": 0.1,
+            "bw": 0.05,
+            "blur": 0.4,
+            "chroma_key": 0.5,
+            "lut": 0.8,
+            "speed": 0.1
+        },
+        "audio_s_per_s": 0.01,
+        "clip_overhead_s": 0.3,
+        "mux_s_per_s": 0.02,
+        "correction": 1.0,
+        "samples": 0,
+        "calibrated": False
+    }
+    # Rough libx264 -crf 23 output size in bits per pixel
+    BITS_PER_PIXEL = 0.08
+    # 16-bit stereo PCM at 48 kHz
+    WAV_BYTES_PER_SECOND = 48000 * 2 * 2
+
+    def __init__(self, path=CALIBRATION_FILE):
+        self.path = path
+        self.table = json.loads(json.dumps(self.DEFAULT_TABLE))
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+            if not isinstance(stored, dict):
+                raise ValueError("calibration file is not a JSON object")
+        except (OSError, ValueError):
+            stored = {}
+        # Only known entries of the right type; anything else keeps its default
+        is_number = lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+        for key, value in stored.items():
+            default = self.table.get(key)
+            if isinstance(default, dict):
+                if isinstance(value, dict):
+                    default.update((name, cost) for name, cost in value.items() if is_number(cost))
+            elif isinstance(default, bool):
+                if isinstance(value, bool):
+                    self.table[key] = value
+            elif key in self.table and is_number(value):
+                self.table[key] = value
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w') as f:
+                json.dump(self.table, f, indent=2)
+        except OSError:
+            pass
+
+    def clip_effects(self, clip):
+        effects = []
+        if clip.get('fade_in', 0) > 0 or clip.get('fade_out', 0) > 0:
+            effects.append("fade")
+        if clip.get('scale', 1) != 1:
+            effects.append("scale")
+        if clip.get('rotation', 0) != 0:
+            effects.append("rotation")
+        if clip.get('opacity', 1) < 1:
+            effects.append("opacity")
+        if clip.get('bw', False):
+            effects.append("bw")
+        if clip.get('blur', 0) > 0:
+            effects.append("blur")
+        if clip.get('chroma_key', False):
+            effects.append("chroma_key")
+        if clip.get('lut', ''):
+            effects.append("lut")
+        if clip.get('speed', 1) != 1:
+            effects.append("speed")
+        return effects
+
+    def clip_render_size(self, clip, project_settings):
+        # Returns (output seconds, frames, megapixels per frame) for a visual clip
+        width, height = project_settings['resolution']
+        fps = project_settings['fps']
+        duration = clip.get('duration', 5)
+        if clip['type'] == "video":
+            width = clip.get('width', width)
+            height = clip.get('height', height)
+            fps = clip.get('fps', fps)
+            duration = duration / clip.get('speed', 1)
+            scale = clip.get('scale', 1)
+            width, height = width * scale, height * scale
+        return duration, duration * fps, width * height / 1e6
+
+    def estimate(self, clips, project_settings, corrected=True):
+        table = self.table
+        render_seconds = 0.0
+        video_bytes = 0.0
+        audio_bytes = 0.0
+        output_seconds = 0.0
+        for clip in clips:
+            if clip['type'] == "audio":
+                render_seconds += clip.get('duration', 10) * table['audio_s_per_s']
+                render_seconds += table['clip_overhead_s']
+                audio_bytes += clip.get('duration', 10) * self.WAV_BYTES_PER_SECOND
+                continue
+            duration, frames, mpx = self.clip_render_size(clip, project_settings)
+            cost = table['type_cost'].get(clip['type'], 1.0)
+            for effect in self.clip_effects(clip):
+                cost += table['effect_cost'].get(effect, 0.0)
+            render_seconds += frames * mpx * table['encode_s_per_mpx'] * cost
+            render_seconds += table['clip_overhead_s']
+            video_bytes += frames * mpx * 1e6 * self.BITS_PER_PIXEL / 8
+            output_seconds += duration
+
+        # Concatenation and final mux
+        render_seconds += output_seconds * table['mux_s_per_s']
+        if audio_bytes:
+            # Mixed track is re-encoded together with the video
+            width, height = project_settings['resolution']
+            render_seconds += (output_seconds * project_settings['fps'] * width * height / 1e6
+                               * table['encode_s_per_mpx'])
+        if corrected:
+            render_seconds *= table['correction']
+
+        # Intermediate clips + concatenated copy + audio stems and mixdown
+        scratch_bytes = video_bytes * 2 + (audio_bytes * 2 if audio_bytes else 0)
+        return {
+            'render_seconds': render_seconds,
+            'scratch_bytes': scratch_bytes,
+            'output_bytes': video_bytes,
+            'output_seconds': output_seconds,
+            'calibrated': table['calibrated'],
+            'samples': table['samples']
+        }
+
+    def record_export(self, clips, project_settings, elapsed):
+        # Blend the observed/predicted ratio into the correction factor
+        predicted = self.estimate(clips, project_settings, corrected=False)['render_seconds']
+        if predicted <= 0 or elapsed <= 0:
+            return
+        ratio = min(max(elapsed / predicted, 0.05), 20.0)
+        alpha = 0.5 if self.table['samples'] < 3 else 0.2
+        self.table['correction'] = (1 - alpha) * self.table['correction'] + alpha * ratio
+        self.table['samples'] += 1
+        self.save()
+
+    def calibrate(self, resolution=(1280, 720), fps=30, seconds=2):
+        # Short synthetic encode with the same settings the exporter uses
+        width, height = resolution
+        cmd = [
+            "ffmpeg", "-y", "-f", "lavfi",
+            "-i", f"testsrc2=size={width}x{height}:rate={fps}",
+            "-t", str(seconds), "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+            "-f", "null", "-"
+        ]
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        self.table['encode_s_per_mpx'] = elapsed / (seconds * fps * width * height / 1e6)
+        self.table['correction'] = 1.0
+        self.table['samples'] = 0
+        self.table['calibrated'] = True
+        self.save()
+        return self.table['encode_s_per_mpx']
+
+    def summary(self, estimate):
+        text = (f"Estimated render time: ~{format_duration(estimate['render_seconds'])}\n"
+                f"Scratch disk needed: {format_bytes(estimate['scratch_bytes'])}\n"
+                f"Approximate output size: {format_bytes(estimate['output_bytes'])}")
+        if not estimate['calibrated']:
+            text += "\n(Uncalibrated estimate - run Project > Calibrate Export Estimate or --calibrate)"
+        elif estimate['samples']:
+            text += f"\n(Based on {estimate['samples']} previous export(s))"
+        return text
+
+class CalibrationThread(QThread):
+    # Runs the export calibration benchmark off the GUI thread
+    calibrated = pyqtSignal(float)  # encode seconds per megapixel
+    failed = pyqtSignal(str)
+
+    def run(self):
+        try:
+            rate = ExportEstimator().calibrate()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.calibrated.emit(rate)
 
 class VideoExportWorker(QObject):
     progress = pyqtSignal(int)
@@ -43,12 +491,14 @@ class VideoExportWorker(QObject):
 
     def __init__(self, clips, project_settings, output_path):
         super().__init__()
-        self.clips = clips
+        # Segments are concatenated in timeline order
+        self.clips = clips.in_time_order()
         self.project_settings = project_settings
         self.output_path = output_path
         self.canceled = False
 
     def export(self):
+        start_time = time.perf_counter()
         try:
             # Create temp directory
             temp_dir = tempfile.mkdtemp()
@@ -139,6 +589,9 @@ class VideoExportWorker(QObject):
             shutil.rmtree(temp_dir)
             
             if not self.canceled:
+                # Feed the actual timing back into the estimator's calibration
+                ExportEstimator().record_export(self.clips, self.project_settings,
+                                                time.perf_counter() - start_time)
                 self.finished.emit(final_output)
             
         except Exception as e:
@@ -472,9 +925,13 @@ class ExportProgressDialog(QDialog):
 
 class TimelineClip(QGraphicsRectItem):
     def __init__(self, start, length, track, color=Qt.GlobalColor.blue, clip_type="video"):
-        super().__init__(0, track * TRACK_HEIGHT, length * TIMELINE_SCALE, TRACK_HEIGHT - 5)
+        super().__init__(0, 0, length * TIMELINE_SCALE, TRACK_HEIGHT - 5)
+        # Positioned before geometry changes are sent, so the start isn't snapped
+        self.setPos(start * TIMELINE_SCALE, track * TRACK_HEIGHT)
         self.setBrush(QBrush(color))
-        self.setPen(QPen(Qt.GlobalColor.black))
+        pen = QPen(Qt.GlobalColor.black)
+        pen.setCosmetic(True)
+        self.setPen(pen)
         self.setFlag(QGraphicsRectItem.GraphicsItemFlag.ItemIsMovable, True)
         self.setFlag(QGraphicsRectItem.GraphicsItemFlag.ItemIsSelectable, True)
         self.setFlag(QGraphicsRectItem.GraphicsItemFlag.ItemSendsGeometryChanges, True)
@@ -485,15 +942,11 @@ class TimelineClip(QGraphicsRectItem):
         self.clip_type = clip_type
         self.name = "Clip"
         self.clip_id = -1
+        self.timeline = None  # set by TimelineWidget.take_item
+        self.zoom = 1.0  # horizontal view scale the children are laid out for
+        self.handles_allowed = True
+        self.resizing = None  # "left" or "right" while an edge is dragged
 
-        # Create label
-        self.text_bg = QGraphicsRectItem(0, 0, length * TIMELINE_SCALE, 20, self)
-        self.text_bg.setBrush(QColor(0, 0, 0, 180))
-        self.text_bg.setPen(QPen(Qt.PenStyle.NoPen))
-        
-        self.label = QGraphicsPixmapItem(self.text_bg)
-        self.update_label()
-        
         # Create handles for resizing
         self.left_handle = QGraphicsRectItem(0, 0, 8, TRACK_HEIGHT - 5, self)
         self.left_handle.setBrush(QBrush(QColor(200, 200, 200, 200)))
@@ -509,17 +962,65 @@ class TimelineClip(QGraphicsRectItem):
         self.left_handle.hide()
         self.right_handle.hide()
         
-    def update_label(self):
-        img = Image.new('RGBA', (200, 20), (0, 0, 0, 0))
-        d = ImageDraw.Draw(img)
-        d.text((5, 0), self.name, fill=(255, 255, 255))
-        qimg = QImage(img.tobytes(), img.width, img.height, QImage.Format.Format_RGBA8888)
-        pixmap = QPixmap.fromImage(qimg)
-        self.label.setPixmap(pixmap)
+    def paint(self, painter, option, widget=None):
+        super().paint(painter, option, widget)
+        if self.timeline is None:
+            return
+        # Level of detail: thumbnails, waveforms and the label only on clips wide enough to show them
+        width = self.rect().width() * painter.worldTransform().m11()
+        if width >= CLIP_DETAIL_MIN_PIXELS:
+            if self.clip_type == "video":
+                self.timeline.draw_filmstrip(painter, self, option.exposedRect)
+            elif self.clip_type == "audio":
+                self.timeline.draw_waveform(painter, self, option.exposedRect)
+        if width >= CLIP_LABEL_MIN_PIXELS:
+            self.timeline.draw_label(painter, self)
+        
+    def place(self, start, duration, track):
+        # Programmatic move and resize, bypassing the drag snapping
+        self.setFlag(QGraphicsRectItem.GraphicsItemFlag.ItemSendsGeometryChanges, False)
+        self.setPos(start * TIMELINE_SCALE, track * TRACK_HEIGHT)
+        self.setFlag(QGraphicsRectItem.GraphicsItemFlag.ItemSendsGeometryChanges, True)
+        self.start_time = start
+        self.track = track
+        self.set_duration(duration, left=0)
+        
+    def matches(self, clip):
+        start, end = self.time_range()
+        return (abs(start - clip['start']) < 1e-6 and abs(end - start - clip['duration']) < 1e-6 and
+                self.track == clip['track'] and self.clip_type == clip['type'] and
+                self.name == clip.get('name', 'Clip'))
+        
+    def set_duration(self, duration, left=None):
+        rect = self.rect()
+        self.duration = duration
+        self.setRect(rect.left() if left is None else left, rect.y(), duration * TIMELINE_SCALE, rect.height())
+        self.apply_zoom(self.zoom)
+        if self.timeline is not None:
+            self.timeline.clip_geometry_changed(self)
+        
+    def time_range(self):
+        # Start and end in seconds; a left resize moves the rect, not the item
+        return ((self.x() + self.rect().left()) / TIMELINE_SCALE,
+                (self.x() + self.rect().right()) / TIMELINE_SCALE)
         
     def show_handles(self, show=True):
-        self.left_handle.setVisible(show)
-        self.right_handle.setVisible(show)
+        self.left_handle.setVisible(show and self.handles_allowed)
+        self.right_handle.setVisible(show and self.handles_allowed)
+        
+    def apply_zoom(self, zoom):
+        # Level of detail: the handles only show on clips wide enough on screen to hold them
+        self.zoom = zoom
+        width = self.rect().width() * zoom
+        self.handles_allowed = width >= 3 * CLIP_HANDLE_PIXELS
+        self.layout_children()
+        self.show_handles(self.isSelected())
+        
+    def layout_children(self):
+        rect = self.rect()
+        handle = CLIP_HANDLE_PIXELS / self.zoom
+        self.left_handle.setRect(rect.x(), 0, handle, TRACK_HEIGHT - 5)
+        self.right_handle.setRect(rect.right() - handle, 0, handle, TRACK_HEIGHT - 5)
         
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -534,27 +1035,24 @@ class TimelineClip(QGraphicsRectItem):
                 self.resizing = None
                 self.setCursor(QCursor(Qt.CursorShape.SizeAllCursor))
                 super().mousePressEvent(event)
+            if self.timeline is not None:
+                self.timeline.begin_gesture(self)
                 
     def mouseMoveEvent(self, event):
-        if self.resizing == "left":
-            # Calculate new position and duration
-            new_x = event.pos().x()
-            new_duration = self.duration - (new_x / TIMELINE_SCALE)
-            if new_duration > 0.1:  # Minimum duration
-                self.duration = new_duration
-                self.setRect(new_x, self.rect().y(), 
-                            self.duration * TIMELINE_SCALE, self.rect().height())
-                self.right_handle.setRect(self.duration * TIMELINE_SCALE - 8, 0, 8, TRACK_HEIGHT - 5)
-                self.update_label()
-        elif self.resizing == "right":
-            new_width = event.pos().x()
-            new_duration = new_width / TIMELINE_SCALE
+        if self.resizing:
+            # The dragged edge snaps; the other edge stays put
+            rect = self.rect()
+            edge = event.pos().x()
+            if self.timeline is not None:
+                edge = self.timeline.snap_edge(self, self.x() + edge) - self.x()
+            left, right = (edge, rect.right()) if self.resizing == "left" else (rect.left(), edge)
+            new_duration = (right - left) / TIMELINE_SCALE
             if new_duration > 0.1:  # Minimum duration
                 self.duration = new_duration
-                self.setRect(0, self.rect().y(), 
-                            self.duration * TIMELINE_SCALE, self.rect().height())
-                self.right_handle.setRect(self.duration * TIMELINE_SCALE - 8, 0, 8, TRACK_HEIGHT - 5)
-                self.update_label()
+                self.setRect(left, rect.y(), right - left, rect.height())
+                self.layout_children()
+                if self.timeline is not None:
+                    self.timeline.clip_geometry_changed(self)
         else:
             super().mouseMoveEvent(event)
             
@@ -562,21 +1060,28 @@ class TimelineClip(QGraphicsRectItem):
         self.resizing = None
         self.setCursor(QCursor(Qt.CursorShape.ArrowCursor))
         super().mouseReleaseEvent(event)
+        if self.timeline is not None:
+            self.timeline.show_snap(None)
+            self.timeline.end_gesture()
         
     def itemChange(self, change, value):
         if change == QGraphicsRectItem.GraphicsItemChange.ItemPositionChange:
-            # Snap to timeline grid
             new_pos = value
-            new_pos.setX(round(new_pos.x() / (TIMELINE_SCALE / 5)) * (TIMELINE_SCALE / 5))
+            if self.timeline is not None:
+                new_pos.setX(self.timeline.snap_move(self, new_pos.x()))
             new_pos.setY(self.track * TRACK_HEIGHT)
             return new_pos
+        if change == QGraphicsRectItem.GraphicsItemChange.ItemPositionHasChanged and self.timeline is not None:
+            self.timeline.clip_geometry_changed(self)
+        elif change == QGraphicsRectItem.GraphicsItemChange.ItemSelectedHasChanged:
+            self.show_handles(bool(value))
             
         return super().itemChange(change, value)
 
 class TimelineWidget(QGraphicsView):
+    TRACK_NAMES = [f"Video {i+1}" for i in range(5)] + [f"Audio {i+1}" for i in range(5)]
     clip_selected = pyqtSignal(int)
-    clip_moved = pyqtSignal(int, float, int)
-    clip_resized = pyqtSignal(int, float)
+    clips_edited = pyqtSignal(list)  # [(clip id, start, duration)], once per drag or resize
     playhead_moved = pyqtSignal(float)
 
     def __init__(self, parent=None):
@@ -588,74 +1093,596 @@ class TimelineWidget(QGraphicsView):
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
         
-        self.clips = []
+        self.clips = {}  # clip id -> TimelineClip, only for clips in and near the view
+        self.model = ClipStore()  # set by sync
+        self.color_for = lambda clip_type: Qt.GlobalColor.gray  # clip type -> brush color, set by sync
+        self.pool = []  # hidden TimelineClips ready for reuse
+        self.gesture = None  # clip id -> (start, end) before the current drag or resize
+        self.drag = None  # grabbed item, start positions and snapped offset of the current drag
+        self.materialized = None  # (start, end) seconds that currently have items
         self.current_time = 0
         self.time_indicator = None
-        self.max_time = 60  # 60 seconds by default
+        self.max_time = 60  # the timeline is at least this long (seconds)
+        self.content_end = 0  # end of the last clip (seconds)
+        self.zoom = 1.0  # horizontal view scale; 1.0 shows TIMELINE_SCALE pixels per second
+        self.frame_rate = DEFAULT_FPS  # sets the deepest zoom
+        self.thumbnails = None
+        self.clip_lookup = None  # clip id -> clip dict
+        self.waveforms = {}  # media path -> WaveformPeaks
+        self.render_ranges = []  # (start, end, state) of the render bar
+        self.labels = OrderedDict()  # (name, elided width or None) -> QStaticText, LRU
+        self.markers = []  # sorted marker times (seconds)
+        self.snapping = True
+        self.snap_index = None  # SnapIndex of clip edges and markers
+        self.snap_indicator = None
         
         self.draw_timeline()
+        self.horizontalScrollBar().valueChanged.connect(self.scrolled)
         
         # Context menu
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
         
+    def scrolled(self, value):
+        # A bound slot, unlike a lambda, is disconnected when the view is destroyed
+        self.update_visible()
+        
     def draw_timeline(self):
+        # The ruler, grid, track backgrounds and labels are painted in
+        # drawBackground; the scene only holds clips and the playhead
         self.scene.clear()
-        self.clips = []
-        
-        # Draw timeline background
-        self.scene.addRect(0, 0, self.max_time * TIMELINE_SCALE, MAX_TRACKS * TRACK_HEIGHT, 
-                          brush=QBrush(QColor(40, 40, 40)))
-        
-        # Draw time markers
-        for i in range(0, self.max_time + 1):
-            x = i * TIMELINE_SCALE
-            self.scene.addLine(x, 0, x, MAX_TRACKS * TRACK_HEIGHT, QPen(QColor(80, 80, 80)))
-            if i % 5 == 0:
-                time_text = self.scene.addText(str(i))
-                time_text.setDefaultTextColor(QColor(200, 200, 200))
-                time_text.setPos(x - 5, -20)
-        
-        # Draw track separators
-        for i in range(1, MAX_TRACKS):
-            self.scene.addLine(0, i * TRACK_HEIGHT, 
-                              self.max_time * TIMELINE_SCALE, i * TRACK_HEIGHT, 
-                              QPen(QColor(60, 60, 60)))
-        
-        # Add track labels
-        track_names = [f"Video {i+1}" for i in range(5)] + [f"Audio {i+1}" for i in range(5)]
-        for i, name in enumerate(track_names):
-            label = self.scene.addText(name)
-            label.setDefaultTextColor(QColor(200, 200, 200))
-            label.setPos(-80, i * TRACK_HEIGHT + 15)
+        self.clips = {}
+        self.pool = []
+        self.materialized = None
+        self.content_end = 0
+        self.update_scene_rect()
+        self.snap_index = SnapIndex()
+        for marker in self.markers:
+            self.snap_index.add_marker(marker)
         
         # Add playhead
-        self.time_indicator = self.scene.addLine(0, 0, 0, MAX_TRACKS * TRACK_HEIGHT, 
-                                               QPen(QColor(255, 50, 50), 2))
-        
-    def add_clip(self, clip_id, start, duration, track=0, name="Clip", 
-                clip_type="video", color=Qt.GlobalColor.blue):
-        clip = TimelineClip(start, duration, track, color, clip_type)
-        clip.clip_id = clip_id
-        clip.name = name
-        clip.update_label()
-        self.scene.addItem(clip)
-        self.clips.append(clip)
-        return clip
+        playhead_pen = QPen(QColor(255, 50, 50), 2)
+        playhead_pen.setCosmetic(True)
+        self.time_indicator = self.scene.addLine(0, 0, 0, MAX_TRACKS * TRACK_HEIGHT, playhead_pen)
+        
+        # Shown while a dragged edge is snapped
+        snap_pen = QPen(QColor(255, 220, 0), 1)
+        snap_pen.setCosmetic(True)
+        self.snap_indicator = self.scene.addLine(0, 0, 0, MAX_TRACKS * TRACK_HEIGHT, snap_pen)
+        self.snap_indicator.setZValue(1)
+        self.snap_indicator.hide()
+        
+    def sync(self, clips, color_for):
+        # Reconciles the timeline with the clip model (a ClipStore): only items
+        # whose clips were removed or changed since the last sync are touched, so
+        # scroll position, selection and cached drawing survive undo and reload
+        self.model = clips
+        self.color_for = color_for
+        for clip_id in [clip_id for clip_id in self.clips if clip_id not in clips]:
+            self.release(self.clips[clip_id])
+        for clip_id in [clip_id for clip_id in self.snap_index.clip_edges if clip_id not in clips]:
+            self.snap_index.remove_clip(clip_id)
+        for clip in clips:
+            self.snap_index.set_clip(clip['id'], clip['start'], clip['start'] + clip['duration'])
+            item = self.clips.get(clip['id'])
+            if item is not None and not item.matches(clip):
+                self.bind(item, clip)
+        self.content_end = clips.end_time()
+        self.update_scene_rect()
+        self.update_visible(force=True)
+        
+    def clip_added(self, clip):
+        # A clip joined the model; it only gets an item if it's near the view
+        self.snap_index.set_clip(clip['id'], clip['start'], clip['start'] + clip['duration'])
+        self.extend_scene(clip['start'] + clip['duration'])
+        if self.materialized and self.materialized[0] < clip['start'] + clip['duration'] and \
+                clip['start'] < self.materialized[1] and clip['duration'] >= self.min_item_duration():
+            self.bind(self.take_item(), clip)
+        else:
+            self.viewport().update()
+            
+    def clip_changed(self, clip):
+        item = self.clips.get(clip['id'])
+        if item is None:
+            self.clip_added(clip)
+        elif not item.matches(clip):
+            self.bind(item, clip)
+            
+    def update_visible(self, force=False):
+        # Clip items exist only for clips within a viewport width either side of
+        # the view, found with the model's interval index; leaving that range, or
+        # zooming in until it spans too many views, recycles the items. Clips
+        # narrower than TIMELINE_MIN_ITEM_PIXELS are left to drawBackground.
+        # Selected and dragged items are kept.
+        view = self.mapToScene(self.viewport().rect()).boundingRect()
+        start, end = view.left() / TIMELINE_SCALE, view.right() / TIMELINE_SCALE
+        margin = end - start
+        window = self.materialized
+        if not force and window and window[0] <= start and end <= window[1] and \
+                window[1] - window[0] <= TIMELINE_ITEM_WINDOW_VIEWS * margin:
+            return
+        self.materialized = (start - margin, end + margin)
+        min_duration = self.min_item_duration()
+        visible = {clip['id']: clip for clip in self.model.overlapping(*self.materialized)
+                   if clip['duration'] >= min_duration}
+        grabber = self.scene.mouseGrabberItem()
+        for clip_id, item in list(self.clips.items()):
+            if clip_id not in visible and not item.isSelected() and item is not grabber:
+                self.release(item)
+        for clip_id, clip in visible.items():
+            if clip_id not in self.clips:
+                self.bind(self.take_item(), clip)
+                
+    def min_item_duration(self):
+        return TIMELINE_MIN_ITEM_PIXELS / (TIMELINE_SCALE * self.zoom)
+        
+    def take_item(self):
+        if self.pool:
+            item = self.pool.pop()
+            item.show()
+            return item
+        item = TimelineClip(0, 1, 0)
+        item.timeline = self
+        item.clip_type = None  # bind sets the brush
+        self.scene.addItem(item)
+        return item
+        
+    def bind(self, item, clip):
+        # Points a (possibly recycled) item at a model clip
+        if item.clip_id != clip['id']:
+            self.clips.pop(item.clip_id, None)
+            item.clip_id = clip['id']
+            self.clips[clip['id']] = item
+        if item.clip_type != clip['type']:
+            item.clip_type = clip['type']
+            item.setBrush(QBrush(self.color_for(clip['type'])))
+        if item.name != clip.get('name', 'Clip'):
+            item.name = clip.get('name', 'Clip')
+            item.update()
+        item.zoom = self.zoom
+        item.place(clip['start'], clip['duration'], clip['track'])
+        
+    def release(self, item):
+        self.clips.pop(item.clip_id, None)
+        item.setSelected(False)
+        item.resizing = None
+        item.clip_id = -1
+        if len(self.pool) < TIMELINE_ITEM_POOL:
+            item.hide()
+            self.pool.append(item)
+        else:
+            self.scene.removeItem(item)
+        
+
+    def begin_gesture(self, item):
+        # Items move freely during a drag or resize; the model only hears about
+        # it once, when the mouse is released
+        items = [clip for clip in self.scene.selectedItems() if isinstance(clip, TimelineClip)]
+        if item.resizing or item not in items:
+            items = [item]
+        self.gesture = {clip.clip_id: clip.time_range() for clip in items}
+        self.drag = {
+            'item': item,
+            'origins': {clip.clip_id: clip.x() for clip in items},
+            'left': min(clip.x() + clip.rect().left() for clip in items),
+            'offset': None,  # last raw offset and its snapped version
+            'shift': 0
+        }
+        
+    def end_gesture(self):
+        gesture, self.gesture = self.gesture, None
+        self.drag = None
+        changes = []
+        for clip_id, (start, end) in (gesture or {}).items():
+            item = self.clips.get(clip_id)
+            if item is None:
+                continue
+            new_start, new_end = item.time_range()
+            if abs(new_start - start) > 1e-9 or abs(new_end - end) > 1e-9:
+                changes.append((clip_id, new_start, new_end - new_start))
+        if changes:
+            self.clips_edited.emit(changes)
+            
+    def clip_geometry_changed(self, item):
+        if item.clip_id == -1:
+            return
+        start, end = item.time_range()
+        self.snap_index.set_clip(item.clip_id, start, end)
+        self.extend_scene(end)
+        
+    def snap_time(self, t, exclude=()):
+        # Nearest clip edge, marker or the playhead within SNAP_PIXELS on screen
+        if not self.snapping:
+            return None
+        tolerance = SNAP_PIXELS / (TIMELINE_SCALE * self.zoom)
+        best = self.snap_index.nearest(t, tolerance, exclude)
+        playhead = abs(self.current_time - t)
+        if playhead <= tolerance and (best is None or playhead < abs(best - t)):
+            best = self.current_time
+        return best
+        
+    def snap_move(self, item, x):
+        # Item x for a drag to x. Qt moves every selected item by the same
+        # offset; it is snapped once, for the grabbed item, and reused for the
+        # rest so the selection keeps its spacing
+        drag = self.drag
+        if drag is None or item.clip_id not in drag['origins']:
+            return item.x() + self.snap_offset(item, item.x(), x - item.x(), {item.clip_id},
+                                               item.x() + item.rect().left())
+        offset = x - drag['origins'][item.clip_id]
+        if drag['offset'] is None or abs(offset - drag['offset']) > 1e-6:
+            grabbed = drag['item']
+            drag['offset'] = offset
+            drag['shift'] = self.snap_offset(grabbed, drag['origins'][grabbed.clip_id], offset,
+                                             drag['origins'], drag['left'])
+        return drag['origins'][item.clip_id] + drag['shift']
+        
+    def snap_offset(self, item, origin, offset, exclude, left):
+        # Snapped version of moving item from x origin by offset: whichever clip
+        # edge is closer to a snap point lands on it, otherwise the clip start
+        # lands on a frame. left, the leftmost x of all that moves, stays >= 0.
+        x = origin + offset
+        rect = item.rect()
+        shift = None
+        snapped = None
+        for edge in ((x + rect.left()) / TIMELINE_SCALE, (x + rect.right()) / TIMELINE_SCALE):
+            target = self.snap_time(edge, exclude)
+            if target is not None and (shift is None or abs(target - edge) < abs(shift)):
+                shift, snapped = target - edge, target
+        if shift is None:
+            start = (x + rect.left()) / TIMELINE_SCALE
+            shift = round(start * self.frame_rate) / self.frame_rate - start
+        self.show_snap(snapped)
+        return max(offset + shift * TIMELINE_SCALE, -left)
+        
+    def snap_edge(self, item, scene_x):
+        # Scene x for a resized clip edge dragged to scene_x
+        t = scene_x / TIMELINE_SCALE
+        snapped = self.snap_time(t, {item.clip_id})
+        self.show_snap(snapped)
+        if snapped is None:
+            snapped = round(t * self.frame_rate) / self.frame_rate
+        return max(snapped, 0) * TIMELINE_SCALE
+        
+    def show_snap(self, t):
+        if t is None:
+            self.snap_indicator.hide()
+        else:
+            x = t * TIMELINE_SCALE
+            self.snap_indicator.setLine(x, 0, x, MAX_TRACKS * TRACK_HEIGHT)
+            self.snap_indicator.show()
+            
+    def set_snapping(self, enabled):
+        self.snapping = enabled
+        
+    def set_markers(self, markers):
+        for marker in self.markers:
+            self.snap_index.remove_marker(marker)
+        self.markers = sorted(markers)
+        for marker in self.markers:
+            self.snap_index.add_marker(marker)
+        self.viewport().update()
+        
+    def toggle_marker(self, t):
+        # Adds a marker at t, or removes the one within half a frame of it
+        i = bisect.bisect_left(self.markers, t - 0.5 / self.frame_rate)
+        if i < len(self.markers) and self.markers[i] <= t + 0.5 / self.frame_rate:
+            self.snap_index.remove_marker(self.markers.pop(i))
+        else:
+            bisect.insort(self.markers, t)
+            self.snap_index.add_marker(t)
+        self.viewport().update()
     
+    def update_scene_rect(self):
+        # The scene runs past the last clip by TIMELINE_END_PADDING and at least
+        # fills the viewport; the track name column keeps its on-screen width
+        left = -TRACK_LABEL_WIDTH / self.zoom
+        right = max(self.max_time, self.content_end + TIMELINE_END_PADDING) * TIMELINE_SCALE
+        right = max(right, left + self.viewport().width() / self.zoom)
+        self.scene.setSceneRect(left, -RULER_HEIGHT, right - left, MAX_TRACKS * TRACK_HEIGHT + RULER_HEIGHT)
+        
+    def extend_scene(self, end_time):
+        if end_time > self.content_end:
+            self.content_end = end_time
+            if (end_time + TIMELINE_END_PADDING) * TIMELINE_SCALE > self.scene.sceneRect().right():
+                self.update_scene_rect()
+                
+    def zoom_range(self):
+        # From frame level down to the whole timeline fitting the viewport
+        span = max(self.content_end, self.max_time) * TIMELINE_SCALE
+        fit = max(self.viewport().width() - TRACK_LABEL_WIDTH, 1) / span
+        return min(fit, 1.0), TIMELINE_MAX_FRAME_PIXELS * self.frame_rate / TIMELINE_SCALE
+        
+    def set_zoom(self, zoom, anchor=None):
+        # anchor: viewport point whose time stays in place (default: the centre)
+        low, high = self.zoom_range()
+        zoom = min(max(zoom, low), high)
+        if zoom == self.zoom:
+            return
+        if anchor is None:
+            anchor = QPointF(self.viewport().rect().center())
+        anchor_x = self.mapToScene(anchor.toPoint()).x()
+        self.zoom = zoom
+        self.update_scene_rect()
+        self.setTransform(QTransform.fromScale(zoom, 1))
+        scroll = self.horizontalScrollBar()
+        scroll.setValue(scroll.value() + self.mapFromScene(QPointF(anchor_x, 0)).x() - int(anchor.x()))
+        for clip in self.clips.values():
+            clip.apply_zoom(zoom)
+        self.update_visible(force=True)
+            
+    def zoom_in(self):
+        self.set_zoom(self.zoom * TIMELINE_ZOOM_STEP)
+        
+    def zoom_out(self):
+        self.set_zoom(self.zoom / TIMELINE_ZOOM_STEP)
+        
+    def zoom_to_fit(self):
+        self.set_zoom(self.zoom_range()[0])
+        self.horizontalScrollBar().setValue(self.horizontalScrollBar().minimum())
+        
+    def wheelEvent(self, event):
+        # Ctrl+wheel zooms around the cursor
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.set_zoom(self.zoom * TIMELINE_ZOOM_STEP ** (event.angleDelta().y() / 120), event.position())
+            event.accept()
+            return
+        super().wheelEvent(event)
+        
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scene_rect()
+        self.update_visible()
+            
+    @staticmethod
+    def ruler_label(seconds):
+        # 5, 2.5, 1:05, 1:05.5, 1:00:00
+        minutes, secs = divmod(round(seconds, 3), 60)
+        whole, fraction = divmod(secs, 1)
+        fraction = f"{fraction:.3f}"[1:].rstrip("0").rstrip(".")
+        if minutes == 0:
+            return f"{int(whole)}{fraction}"
+        hours, minutes = divmod(int(minutes), 60)
+        if hours == 0:
+            return f"{minutes}:{int(whole):02d}{fraction}"
+        return f"{hours}:{minutes:02d}:{int(whole):02d}{fraction}"
+    
+    def drawBackground(self, painter, rect):
+        # Track backgrounds, grid, ruler and track names, limited to the exposed
+        # rect. Tick spacing follows the zoom, so the cost scales with the
+        # viewport rather than the project length.
+        super().drawBackground(painter, rect)
+        tracks_bottom = MAX_TRACKS * TRACK_HEIGHT
+        tracks = QRectF(0, 0, self.scene.sceneRect().right(), tracks_bottom)
+        painter.fillRect(tracks.intersected(rect), QColor(40, 40, 40))
+        
+        pixels_per_second = TIMELINE_SCALE * max(painter.worldTransform().m11(), 1e-6)
+        # Frame ticks when zoomed in further than RULER_INTERVALS reaches
+        intervals = [n / self.frame_rate for n in (1, 2) if n / self.frame_rate < RULER_INTERVALS[0]]
+        intervals += RULER_INTERVALS
+        tick = next((interval for interval in intervals
+                     if interval * pixels_per_second >= RULER_TICK_SPACING), intervals[-1])
+        label_every = next((interval for interval in intervals
+                            if interval * pixels_per_second >= RULER_LABEL_SPACING and
+                            abs(interval / tick - round(interval / tick)) < 1e-6), intervals[-1])
+        label_ticks = max(1, int(round(label_every / tick)))
+        step = tick * TIMELINE_SCALE
+        first = max(int(np.floor(rect.left() / step)), 0)
+        last = int(np.ceil(min(rect.right(), tracks.right()) / step))
+        
+        grid_pen = QPen(QColor(80, 80, 80))
+        grid_pen.setCosmetic(True)
+        painter.setPen(grid_pen)
+        top = max(rect.top(), 0)
+        bottom = min(rect.bottom(), tracks_bottom)
+        if top < bottom:
+            painter.drawLines([QLineF(i * step, top, i * step, bottom) for i in range(first, last + 1)])
+            
+        separator_pen = QPen(QColor(60, 60, 60))
+        separator_pen.setCosmetic(True)
+        painter.setPen(separator_pen)
+        left = max(rect.left(), 0)
+        right = min(rect.right(), tracks.right())
+        first_track = max(int(rect.top() // TRACK_HEIGHT), 1)
+        last_track = min(int(rect.bottom() // TRACK_HEIGHT), MAX_TRACKS - 1)
+        if left < right:
+            painter.drawLines([QLineF(left, i * TRACK_HEIGHT, right, i * TRACK_HEIGHT)
+                               for i in range(first_track, last_track + 1)])
+        self.draw_small_clips(painter, rect)
+        
+        # Text is drawn in view coordinates so it stays legible at any zoom
+        transform = painter.worldTransform()
+        painter.save()
+        painter.resetTransform()
+        painter.setPen(QColor(200, 200, 200))
+        if rect.top() < 0:
+            # Start one label early: its text may reach into the exposed rect
+            label_first = max(first // label_ticks - 1, 0) * label_ticks
+            for i in range(label_first, last + 1, label_ticks):
+                painter.drawText(transform.map(QPointF(i * step, -6)) + QPointF(-1, 0),
+                                 self.ruler_label(round(i * tick, 3)))
+        if rect.left() < 0:
+            left = transform.map(QPointF(-TRACK_LABEL_WIDTH / self.zoom, 0)).x() + 10
+            for i, name in enumerate(self.TRACK_NAMES):
+                top = transform.map(QPointF(0, i * TRACK_HEIGHT)).y()
+                painter.drawText(QRectF(left, top, TRACK_LABEL_WIDTH - 10, TRACK_HEIGHT),
+                                 Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, name)
+        painter.restore()
+    
+    def draw_small_clips(self, painter, rect):
+        # Clips too narrow for an item, merged into runs of whole device pixels
+        # per track, so a zoomed out project costs a few rectangles per track
+        zoom = max(painter.worldTransform().m11(), 1e-6)
+        pixels_per_second = TIMELINE_SCALE * zoom
+        min_duration = TIMELINE_MIN_ITEM_PIXELS / pixels_per_second
+        start, end = max(rect.left(), 0) / TIMELINE_SCALE, rect.right() / TIMELINE_SCALE
+        first_track = max(int(rect.top() // TRACK_HEIGHT), 0)
+        last_track = min(int(rect.bottom() // TRACK_HEIGHT), MAX_TRACKS - 1)
+        if end <= start:
+            return
+        runs = []  # (first pixel, last pixel, track, clip type)
+        for track in range(first_track, last_track + 1):
+            run = None
+            for clip in self.model.overlapping(start, end, track):
+                if clip['duration'] >= min_duration:
+                    continue
+                left = int(clip['start'] * pixels_per_second)
+                right = max(int(np.ceil((clip['start'] + clip['duration']) * pixels_per_second)), left + 1)
+                if run and left <= run[1]:
+                    run[1] = max(run[1], right)
+                else:
+                    run = [left, right, track, clip['type']]
+                    runs.append(run)
+        for left, right, track, clip_type in runs:
+            painter.fillRect(QRectF(left / zoom, track * TRACK_HEIGHT, (right - left) / zoom, TRACK_HEIGHT - 5),
+                             self.color_for(clip_type))
+        
+    def set_thumbnail_source(self, thumbnails, clip_lookup):
+        self.thumbnails = thumbnails
+        self.clip_lookup = clip_lookup
+        thumbnails.thumbnail_ready.connect(self.thumbnail_loaded)
+        
+    def thumbnail_loaded(self, path):
+        # A bound slot, unlike a lambda, is disconnected when the view is destroyed
+        self.viewport().update()
+        
+    def draw_filmstrip(self, painter, item, exposed):
+        # Thumbnails under the label band, one per thumbnail width at the current
+        # scale. Only the exposed part is requested; missing ones appear once loaded.
+        clip = self.clip_lookup(item.clip_id) if self.clip_lookup else None
+        if not clip or not self.thumbnails or not clip.get('path'):
+            return
+        rect = item.rect()
+        strip = QRectF(rect.x(), rect.y() + 20, rect.width(), rect.height() - 20)
+        aspect = clip.get('width', 16) / max(clip.get('height', 9), 1)
+        # Thumbnails keep their aspect on screen whatever the horizontal zoom
+        step = max(strip.height() * aspect / max(painter.worldTransform().m11(), 1e-6), 1e-3)
+        left = max(exposed.left(), strip.left())
+        right = min(exposed.right(), strip.right())
+        x = strip.left() + int((left - strip.left()) // step) * step
+        
+        painter.save()
+        painter.setClipRect(strip)
+        while x < right:
+            source_time = clip.get('start_trim', 0) + (x - rect.x()) / TIMELINE_SCALE * clip.get('speed', 1)
+            image = self.thumbnails.request(clip['path'], source_time)
+            if image is not None:
+                painter.drawImage(QRectF(x, strip.top(), step, strip.height()), image)
+            x += step
+        painter.restore()
+        
+    def draw_label(self, painter, item):
+        # Name band along the clip top, drawn in view coordinates so the text
+        # keeps its size at any zoom
+        band = painter.worldTransform().mapRect(QRectF(item.rect().x(), item.rect().y(), item.rect().width(), 20))
+        text = self.label_text(item.name, band.width() - 10)
+        painter.save()
+        painter.resetTransform()
+        painter.fillRect(band, QColor(0, 0, 0, 180))
+        painter.setFont(self.font())
+        painter.setPen(Qt.GlobalColor.white)
+        painter.drawStaticText(QPointF(band.left() + 5, band.top() + (band.height() - text.size().height()) / 2), text)
+        painter.restore()
+        
+    def label_text(self, name, max_width):
+        # Laid-out label text shared by every clip of that name. Labels too long
+        # for the clip are elided to a multiple of CLIP_LABEL_WIDTH_STEP, so
+        # resizing a clip reuses a few layouts instead of making new ones.
+        full = self.cached_label(name, None)
+        if full.size().width() <= max_width:
+            return full
+        return self.cached_label(name, max(int(max_width // CLIP_LABEL_WIDTH_STEP), 0) * CLIP_LABEL_WIDTH_STEP)
+        
+    def cached_label(self, name, width):
+        key = (name, width)
+        text = self.labels.get(key)
+        if text is not None:
+            self.labels.move_to_end(key)
+            return text
+        if width is not None:
+            name = QFontMetrics(self.font()).elidedText(name, Qt.TextElideMode.ElideRight, width)
+        text = QStaticText(name)
+        text.setTextFormat(Qt.TextFormat.PlainText)
+        text.prepare(QTransform(), self.font())
+        self.labels[key] = text
+        if len(self.labels) > CLIP_LABEL_CACHE_ITEMS:
+            self.labels.popitem(last=False)
+        return text
+        
+    def set_render_ranges(self, ranges):
+        self.render_ranges = ranges
+        self.viewport().update()
+        
+    def drawForeground(self, painter, rect):
+        # Render bar above the tracks: green = preview rendered, red = needs render
+        super().drawForeground(painter, rect)
+        colors = {"rendered": QColor(60, 200, 80), "unrendered": QColor(220, 60, 60)}
+        for start, end, state in self.render_ranges:
+            painter.fillRect(QRectF(start * TIMELINE_SCALE, -4, (end - start) * TIMELINE_SCALE, 4),
+                             colors[state])
+        # Markers in the exposed rect
+        first = bisect.bisect_left(self.markers, rect.left() / TIMELINE_SCALE)
+        last = bisect.bisect_right(self.markers, rect.right() / TIMELINE_SCALE)
+        if first < last:
+            marker_pen = QPen(QColor(255, 220, 0))
+            marker_pen.setCosmetic(True)
+            painter.setPen(marker_pen)
+            painter.drawLines([QLineF(t * TIMELINE_SCALE, -RULER_HEIGHT, t * TIMELINE_SCALE, -8)
+                               for t in self.markers[first:last]])
+        
+    def set_waveform(self, path, peaks):
+        self.waveforms[path] = peaks
+        self.viewport().update()
+        
+    def draw_waveform(self, painter, item, exposed):
+        # Filled min/max envelope, one column per device pixel of the exposed part
+        clip = self.clip_lookup(item.clip_id) if self.clip_lookup else None
+        peaks = self.waveforms.get(clip.get('path')) if clip else None
+        if peaks is None:
+            return
+        rect = item.rect()
+        strip = QRectF(rect.x(), rect.y() + 20, rect.width(), rect.height() - 20)
+        left = max(exposed.left(), strip.left())
+        right = min(exposed.right(), strip.right())
+        pixels_per_unit = max(painter.worldTransform().m11(), 1e-6)
+        count = int(np.ceil((right - left) * pixels_per_unit))
+        if count <= 0:
+            return
+        speed = clip.get('speed', 1)
+        source_start = clip.get('start_trim', 0) + (left - rect.x()) / TIMELINE_SCALE * speed
+        source_end = clip.get('start_trim', 0) + (right - rect.x()) / TIMELINE_SCALE * speed
+        columns = peaks.columns(source_start, source_end, count)
+        if columns is None:
+            return
+        mins, maxs = columns
+        gain = min(clip.get('volume', 1.0), 4.0)
+        center = strip.center().y()
+        half = strip.height() / 2
+        xs = left + (np.arange(count) + 0.5) / pixels_per_unit
+        tops = center - np.clip(maxs * gain, -1, 1) * half
+        bottoms = center - np.clip(mins * gain, -1, 1) * half
+        polygon = QPolygonF([QPointF(x, y) for x, y in zip(xs, tops)] +
+                            [QPointF(x, y) for x, y in zip(xs[::-1], bottoms[::-1])])
+        painter.save()
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(255, 220, 255, 200))
+        painter.drawPolygon(polygon)
+        painter.restore()
+        
     def remove_clip(self, clip_id):
-        for clip in self.clips[:]:
-            if clip.clip_id == clip_id:
-                self.scene.removeItem(clip)
-                self.clips.remove(clip)
-                return True
-        return False
+        # A clip left the model
+        edges = self.snap_index.clip_edges.get(clip_id)
+        self.snap_index.remove_clip(clip_id)
+        item = self.clips.get(clip_id)
+        if item is not None:
+            self.release(item)
+        if edges and edges[1] >= self.content_end:
+            self.content_end = self.model.end_time()
+            self.update_scene_rect()
+        return edges is not None
     
     def get_clip(self, clip_id):
-        for clip in self.clips:
-            if clip.clip_id == clip_id:
-                return clip
-        return None
+        return self.clips.get(clip_id)
     
     def set_current_time(self, time):
         self.current_time = time
@@ -669,7 +1696,7 @@ class TimelineWidget(QGraphicsView):
             pos = self.mapToScene(event.pos())
             if 0 <= pos.y() <= MAX_TRACKS * TRACK_HEIGHT:
                 # Move playhead to clicked position
-                time = max(0, min(pos.x() / TIMELINE_SCALE, self.max_time))
+                time = max(0, min(pos.x() / TIMELINE_SCALE, self.sceneRect().right() / TIMELINE_SCALE))
                 self.set_current_time(time)
                 self.playhead_moved.emit(time)
                 
@@ -704,41 +1731,2059 @@ class TimelineWidget(QGraphicsView):
             sticker_action = menu.addAction("Add Sticker")
             sticker_action.triggered.connect(lambda: self.parent().add_sticker(track))
             
-            # Add split action only if a clip is selected
-            selected_clip = None
-            for item in self.scene.selectedItems():
-                if isinstance(item, TimelineClip):
-                    selected_clip = item
-                    break
-                    
-            if selected_clip:
-                split_action = menu.addAction("Split Clip")
-                split_action.triggered.connect(lambda: self.parent().split_clip(selected_clip))
-                
-        else:  # Audio tracks
-            audio_action = menu.addAction("Import Audio")
-            audio_action.triggered.connect(lambda: self.parent().import_audio(track))
+            # Add split action only if a clip is selected
+            selected_clip = None
+            for item in self.scene.selectedItems():
+                if isinstance(item, TimelineClip):
+                    selected_clip = item
+                    break
+                    
+            if selected_clip:
+                split_action = menu.addAction("Split Clip")
+                split_action.triggered.connect(lambda: self.parent().split_clip(selected_clip))
+                
+        else:  # Audio tracks
+            audio_action = menu.addAction("Import Audio")
+            audio_action.triggered.connect(lambda: self.parent().import_audio(track))
+            
+        menu.exec(self.mapToGlobal(pos))
+
+class KeyframeIndex:
+    # Per-media frame timestamp and keyframe table built from packet flags
+    VERSION = 1
+
+    def __init__(self, frame_times, keyframes):
+        self.frame_times = frame_times  # presentation time of each frame (seconds)
+        self.keyframes = keyframes  # sorted frame numbers of keyframes
+
+    @classmethod
+    def build(cls, path):
+        cmd = [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        packets = []
+        for line in result.stdout.splitlines():
+            parts = line.strip().split(',')
+            if len(parts) < 2 or parts[0] in ("", "N/A"):
+                continue
+            packets.append((float(parts[0]), 'K' in parts[1]))
+        if not packets:
+            return None
+        # Packets arrive in decode order; frame numbers follow presentation order
+        packets.sort()
+        frame_times = [pts for pts, _ in packets]
+        keyframes = [i for i, (_, key) in enumerate(packets) if key]
+        if not keyframes or keyframes[0] != 0:
+            keyframes.insert(0, 0)
+        return cls(frame_times, keyframes)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(media_cache_path(path, ".kfindex.json"), 'r') as f:
+                data = json.load(f)
+            if data.get('version') != cls.VERSION:
+                return None
+            return cls(data['frame_times'], data['keyframes'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path):
+        try:
+            os.makedirs(PYCUT_CACHE_DIR, exist_ok=True)
+            with open(media_cache_path(path, ".kfindex.json"), 'w') as f:
+                json.dump({
+                    'version': self.VERSION,
+                    'frame_times': self.frame_times,
+                    'keyframes': self.keyframes
+                }, f)
+        except OSError:
+            pass
+
+    def preceding_keyframe(self, frame_num):
+        i = bisect.bisect_right(self.keyframes, frame_num) - 1
+        return self.keyframes[max(i, 0)]
+
+    def frame_at_time(self, seconds):
+        # Last frame whose presentation time is <= seconds (exact for VFR media)
+        base = self.frame_times[0]
+        return max(bisect.bisect_right(self.frame_times, base + seconds) - 1, 0)
+
+    def time_of(self, frame_num):
+        frame_num = min(max(int(frame_num), 0), len(self.frame_times) - 1)
+        return self.frame_times[frame_num] - self.frame_times[0]
+
+class KeyframeIndexThread(QThread):
+    # Builds (or loads from the sidecar cache) keyframe indexes for imported media
+    index_ready = pyqtSignal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.running = True
+
+    def enqueue(self, path):
+        with self.condition:
+            if path not in self.queue:
+                self.queue.append(path)
+                self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    break
+                path = self.queue.popleft()
+                
+            index = KeyframeIndex.load(path)
+            if index is None:
+                try:
+                    index = KeyframeIndex.build(path)
+                except (OSError, subprocess.CalledProcessError, ValueError):
+                    index = None
+                if index is not None:
+                    index.save(path)
+            if index is not None:
+                self.index_ready.emit(path, index)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.wait()
+
+class WaveformPeaks:
+    # Min/max audio peaks at several resolutions (mipmap-style): level 0 has one
+    # peak per WAVEFORM_BLOCK samples, each further level merges
+    # WAVEFORM_LEVEL_FACTOR peaks of the previous one. Drawing at any zoom level
+    # reads the coarsest level that still has a peak per pixel.
+    VERSION = 1
+    MAX_LEVELS = 8
+
+    def __init__(self, mins, maxs, rate=WAVEFORM_SAMPLE_RATE, block=WAVEFORM_BLOCK):
+        self.rate = rate
+        self.levels = []  # (samples per peak, mins, maxs) with int16 peaks
+        samples = block
+        while True:
+            self.levels.append((samples, mins, maxs))
+            if len(mins) <= WAVEFORM_LEVEL_FACTOR or len(self.levels) >= self.MAX_LEVELS:
+                break
+            count = len(mins) // WAVEFORM_LEVEL_FACTOR * WAVEFORM_LEVEL_FACTOR
+            tail_min, tail_max = mins[count:], maxs[count:]
+            mins = mins[:count].reshape(-1, WAVEFORM_LEVEL_FACTOR).min(axis=1)
+            maxs = maxs[:count].reshape(-1, WAVEFORM_LEVEL_FACTOR).max(axis=1)
+            if len(tail_min):
+                mins = np.append(mins, tail_min.min())
+                maxs = np.append(maxs, tail_max.max())
+            samples *= WAVEFORM_LEVEL_FACTOR
+
+    @property
+    def duration(self):
+        samples, mins, _ = self.levels[0]
+        return len(mins) * samples / self.rate
+
+    @classmethod
+    def build(cls, path, cancelled=None):
+        # One streaming pass over the decoded PCM; memory stays at one chunk
+        cmd = [
+            "ffmpeg", "-v", "error", "-i", path, "-vn", "-ac", "1",
+            "-ar", str(WAVEFORM_SAMPLE_RATE), "-f", "s16le", "-"
+        ]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        chunk_bytes = WAVEFORM_SAMPLE_RATE * 2 * 4  # 4 seconds of audio
+        mins, maxs = [], []
+        remainder = np.empty(0, dtype=np.int16)
+        try:
+            while True:
+                if cancelled and cancelled():
+                    process.kill()
+                    return None
+                data = process.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                samples = np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16)
+                if len(remainder):
+                    samples = np.concatenate([remainder, samples])
+                count = len(samples) // WAVEFORM_BLOCK * WAVEFORM_BLOCK
+                blocks = samples[:count].reshape(-1, WAVEFORM_BLOCK)
+                mins.append(blocks.min(axis=1))
+                maxs.append(blocks.max(axis=1))
+                remainder = samples[count:]
+        finally:
+            process.stdout.close()
+            process.wait()
+        if len(remainder):
+            mins.append(remainder.min(keepdims=True))
+            maxs.append(remainder.max(keepdims=True))
+        if not mins:
+            return None
+        return cls(np.concatenate(mins), np.concatenate(maxs))
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(media_cache_path(path, ".peaks.npz")) as data:
+                if int(data['version']) != cls.VERSION:
+                    return None
+                return cls(data['mins'], data['maxs'], int(data['rate']), int(data['block']))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path):
+        # Only level 0 is stored; the coarser levels are cheap to rebuild
+        block, mins, maxs = self.levels[0]
+        try:
+            os.makedirs(PYCUT_CACHE_DIR, exist_ok=True)
+            with open(media_cache_path(path, ".peaks.npz"), 'wb') as f:
+                np.savez(f, version=self.VERSION, rate=self.rate, block=block, mins=mins, maxs=maxs)
+        except OSError:
+            pass
+
+    def columns(self, start, end, count):
+        # (mins, maxs) in -1..1 for count equal columns covering start..end seconds
+        start = max(start, 0.0)
+        if count <= 0 or end <= start:
+            return None
+        # At least two peaks per column keeps column edges within a quarter column
+        seconds_per_column = (end - start) / count
+        samples, level_mins, level_maxs = self.levels[0]
+        for level in self.levels[1:]:
+            if 2 * level[0] / self.rate > seconds_per_column:
+                break
+            samples, level_mins, level_maxs = level
+        peak_seconds = samples / self.rate
+        positions = np.rint(np.linspace(start, end, count + 1) / peak_seconds).astype(np.int64)
+        stop = int(min(max(positions[-1], positions[-2] + 1), len(level_mins)))
+        first = positions[:-1]
+        valid = first < stop
+        if not valid.any():
+            return None
+        first = np.minimum(first, stop - 1)
+        mins = np.minimum.reduceat(level_mins[:stop], first).astype(np.float32) / 32768
+        maxs = np.maximum.reduceat(level_maxs[:stop], first).astype(np.float32) / 32768
+        mins[~valid] = 0
+        maxs[~valid] = 0
+        return mins, maxs
+
+class WaveformThread(QThread):
+    # Builds (or loads from the sidecar cache) waveform peaks for audio media
+    peaks_ready = pyqtSignal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.running = True
+
+    def enqueue(self, path):
+        with self.condition:
+            if path not in self.queue:
+                self.queue.append(path)
+                self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    break
+                path = self.queue.popleft()
+                
+            peaks = WaveformPeaks.load(path)
+            if peaks is None:
+                try:
+                    peaks = WaveformPeaks.build(path, cancelled=lambda: not self.running)
+                except OSError:
+                    peaks = None
+                if peaks is not None:
+                    peaks.save(path)
+            if peaks is not None:
+                self.peaks_ready.emit(path, peaks)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.wait()
+
+def proxy_path_for(path):
+    return media_cache_path(path, ".proxy.avi")
+
+class ProxyThread(QThread):
+    # Transcodes low-resolution, intra-frame (MJPEG) proxies for imported media.
+    # Frame count and rate are preserved so frame numbers map 1:1 to the original.
+    proxy_status = pyqtSignal(str, str)  # original path, status
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.running = True
+        self.process = None
+
+    def enqueue(self, path):
+        if os.path.exists(proxy_path_for(path)):
+            self.proxy_status.emit(path, "ready")
+            return
+        with self.condition:
+            if path in self.queue:
+                return
+            self.queue.append(path)
+            self.condition.notify_all()
+        self.proxy_status.emit(path, "queued")
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    break
+                path = self.queue.popleft()
+                
+            proxy_path = proxy_path_for(path)
+            if os.path.exists(proxy_path):
+                self.proxy_status.emit(path, "ready")
+                continue
+                
+            self.proxy_status.emit(path, "building")
+            os.makedirs(PYCUT_CACHE_DIR, exist_ok=True)
+            temp_path = proxy_path + ".part.avi"
+            cmd = [
+                "ffmpeg", "-y", "-i", path, "-map", "0:v:0",
+                "-vf", f"scale=-2:{PROXY_HEIGHT}", "-c:v", "mjpeg", "-q:v", "5",
+                "-an", temp_path
+            ]
+            # Started under the lock, so stop() either sees the process or
+            # stops us before it exists
+            with self.condition:
+                if not self.running:
+                    break
+                try:
+                    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                except OSError:
+                    process = None
+                self.process = process
+            returncode = process.wait() if process else -1
+            with self.condition:
+                self.process = None
+            
+            if returncode == 0 and self.running:
+                os.replace(temp_path, proxy_path)
+                self.proxy_status.emit(path, "ready")
+            else:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                if self.running:
+                    self.proxy_status.emit(path, "failed")
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+            if self.process:
+                self.process.terminate()
+        self.wait()
+
+class ThumbnailPool(QObject):
+    # Filmstrip thumbnails for timeline clips. Requests from the GUI thread only
+    # look up memory; misses are queued for a pool of worker threads which load
+    # them from the on-disk cache or decode a single keyframe.
+    thumbnail_ready = pyqtSignal(str)  # media path
+
+    def __init__(self, keyframe_indexes=None, workers=THUMBNAIL_WORKERS, parent=None):
+        super().__init__(parent)
+        self.keyframe_indexes = keyframe_indexes if keyframe_indexes is not None else {}
+        self.images = OrderedDict()  # (path, time in ms) -> QImage, LRU order
+        self.failed = set()
+        self.pending = set()
+        self.queue = deque()  # (path, time in ms, keyframe number or None)
+        self.condition = threading.Condition()
+        self.running = True
+        self.workers = [ThumbnailThread(self) for _ in range(workers)]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def request(self, path, seconds):
+        # Without an index, thumbnails are taken on whole seconds
+        index = self.keyframe_indexes.get(path)
+        if index is not None:
+            frame_num = index.preceding_keyframe(index.frame_at_time(seconds))
+            key = (path, int(round(index.time_of(frame_num) * 1000)))
+        else:
+            frame_num = None
+            key = (path, int(max(seconds, 0)) * 1000)
+        with self.condition:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+                return image
+            if key not in self.pending and key not in self.failed:
+                self.pending.add(key)
+                self.queue.append(key + (frame_num,))
+                self.condition.notify()
+            return None
+
+    def next_request(self):
+        with self.condition:
+            while self.running and not self.queue:
+                self.condition.wait()
+            if not self.running:
+                return None
+            return self.queue.popleft()
+
+    def finish(self, key, image):
+        with self.condition:
+            self.pending.discard(key)
+            if image is None:
+                self.failed.add(key)
+                return
+            self.images[key] = image
+            while len(self.images) > THUMBNAIL_MEMORY_ITEMS:
+                self.images.popitem(last=False)
+        self.thumbnail_ready.emit(key[0])
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.wait()
+
+class ThumbnailThread(QThread):
+    # One worker of a ThumbnailPool
+    MAX_CAPTURES = 4
+
+    def __init__(self, pool, parent=None):
+        super().__init__(parent)
+        self.pool = pool
+        self.captures = OrderedDict()  # path -> cv2.VideoCapture
+
+    def run(self):
+        while True:
+            request = self.pool.next_request()
+            if request is None:
+                break
+            path, time_ms, frame_num = request
+            try:
+                image = self.load(path, time_ms, frame_num)
+            except cv2.error:
+                image = None
+            self.pool.finish((path, time_ms), image)
+        for cap in self.captures.values():
+            cap.release()
+
+    def load(self, path, time_ms, frame_num):
+        cache_dir = media_cache_path(path, ".thumbs")
+        cache_file = os.path.join(cache_dir, f"{time_ms}.jpg")
+        frame = cv2.imread(cache_file) if os.path.exists(cache_file) else None
+        if frame is None:
+            frame = self.extract(path, time_ms, frame_num)
+            if frame is None:
+                return None
+            os.makedirs(cache_dir, exist_ok=True)
+            cv2.imwrite(cache_file, frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        height, width = frame.shape[:2]
+        return QImage(frame.data, width, height, frame.strides[0], QImage.Format.Format_BGR888).copy()
+
+    def extract(self, path, time_ms, frame_num):
+        if frame_num is not None:
+            # A known keyframe: ffmpeg with -skip_frame nokey decodes only that frame
+            frame = self.extract_keyframe(path, time_ms)
+            if frame is not None:
+                return frame
+        cap = self.captures.pop(path, None)
+        if cap is None:
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                return None
+        self.captures[path] = cap
+        while len(self.captures) > self.MAX_CAPTURES:
+            self.captures.popitem(last=False)[1].release()
+        # OpenCV decodes from the preceding keyframe, up to a whole GOP per seek
+        if frame_num is not None:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+        else:
+            cap.set(cv2.CAP_PROP_POS_MSEC, time_ms)
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        height, width = frame.shape[:2]
+        size = (max(1, int(round(width * THUMBNAIL_HEIGHT / height))), THUMBNAIL_HEIGHT)
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def extract_keyframe(self, path, time_ms):
+        cmd = [
+            "ffmpeg", "-v", "error", "-noaccurate_seek", "-ss", f"{time_ms / 1000 + 0.001:.3f}",
+            "-skip_frame", "nokey", "-i", path, "-an", "-frames:v", "1",
+            "-vf", f"scale=-2:{THUMBNAIL_HEIGHT}:flags=area", "-f", "image2pipe", "-c:v", "bmp", "-"
+        ]
+        try:
+            data = subprocess.run(cmd, capture_output=True).stdout
+        except OSError:
+            return None
+        if not data:
+            return None
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+class IndexedCapture:
+    # cv2.VideoCapture that tracks its read position and seeks via the keyframe
+    # index: jump to the nearest preceding keyframe, then decode forward only as
+    # far as needed. Short forward hops never seek at all.
+    MAX_FORWARD_GRAB = 4  # without an index, grab this many frames instead of seeking
+
+    def __init__(self, path, index=None):
+        self.cap = cv2.VideoCapture(path)
+        self.index = index
+        self.pos = 0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret:
+            self.pos += 1
+        return ret, frame
+
+    def read_frame(self, frame_num, max_grab=MAX_FORWARD_GRAB):
+        frame_num = int(frame_num)
+        if self.index is not None:
+            keyframe = self.index.preceding_keyframe(frame_num)
+            # Decoding forward from the current position is cheaper unless a
+            # keyframe lies between here and the target
+            if not (keyframe <= self.pos <= frame_num):
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+                self.pos = keyframe
+        elif not (self.pos <= frame_num <= self.pos + max_grab):
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+            self.pos = frame_num
+            
+        while self.pos < frame_num:
+            if not self.cap.grab():
+                return None
+            self.pos += 1
+        ret, frame = self.read()
+        return frame if ret else None
+
+    def read_segment(self, frame_num, max_frames=REVERSE_SEGMENT_FRAMES):
+        # The frames from the start of frame_num's GOP (or at most max_frames back)
+        # up to frame_num, decoded in one forward pass: [(frame_num, frame), ...]
+        frame_num = int(frame_num)
+        first = max(frame_num - max_frames + 1, 0)
+        if self.index is not None:
+            first = max(first, self.index.preceding_keyframe(frame_num))
+        frames = []
+        for n in range(first, frame_num + 1):
+            frame = self.read_frame(n)
+            if frame is None:
+                break
+            frames.append((n, frame))
+        return frames
+
+def reduction_level(source_size, max_size, max_level):
+    # Number of halvings (up to max_level) that keep source_size at least as
+    # large as its fit inside max_size
+    width, height = source_size
+    target = source_size
+    if width > max_size[0] or height > max_size[1]:
+        target = fit_size(width, height, max_size[0], max_size[1])
+    level = 0
+    while level < max_level and width >> (level + 1) >= target[0] and height >> (level + 1) >= target[1]:
+        level += 1
+    return level
+
+class ReducedCapture(IndexedCapture):
+    # Sequential ffmpeg reader producing frames already reduced to `size`.
+    # Codecs that support it decode at 1/2^lowres of the source resolution;
+    # the rest of the downscale happens in the same pass as the pixel format
+    # conversion. Forward hops read through; anything else restarts the pipe.
+    MAX_LOWRES = 3
+    MIN_SCALE_REDUCTION = 4  # without lowres, a pipe only pays off from this downscale on
+    MAX_FORWARD_READ = 30
+
+    def __init__(self, path, size, source_size, fps, lowres=0, index=None):
+        self.path = path
+        self.width, self.height = size
+        self.source_size = source_size
+        self.fps = fps
+        self.lowres = lowres
+        self.index = index
+        self.process = None
+        self.pos = 0
+        self.produced = False  # the current ffmpeg process has output a frame
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.source_size[0],
+                cv2.CAP_PROP_FRAME_HEIGHT: self.source_size[1],
+                cv2.CAP_PROP_FPS: self.fps}.get(prop, 0)
+
+    def release(self):
+        if self.process:
+            self.process.kill()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+
+    def start(self, frame_num):
+        self.release()
+        seconds = self.index.time_of(frame_num) if self.index is not None else frame_num / self.fps
+        # Accurate input seek; backing off a quarter frame keeps frame_num itself
+        seconds = max(0.0, seconds - 0.25 / self.fps)
+        cmd = ["ffmpeg", "-v", "error"]
+        if self.lowres:
+            cmd += ["-lowres", str(self.lowres)]
+        cmd += [
+            "-ss", f"{seconds:.4f}", "-i", self.path, "-an", "-vsync", "passthrough",
+            "-vf", f"scale={self.width}:{self.height}:flags=area",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-"
+        ]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.pos = frame_num
+        self.produced = False
+
+    def read(self):
+        frame = self.read_frame(self.pos)
+        return frame is not None, frame
+
+    def read_frame(self, frame_num, max_grab=IndexedCapture.MAX_FORWARD_GRAB):
+        frame_num = int(frame_num)
+        if self.process is None or not (
+                self.pos <= frame_num <= self.pos + max(max_grab, self.MAX_FORWARD_READ)):
+            self.start(frame_num)
+        while True:
+            frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+            if self.process.stdout.readinto(memoryview(frame).cast('B')) != frame.nbytes:
+                self.release()
+                return None
+            self.produced = True
+            self.pos += 1
+            if self.pos > frame_num:
+                return frame
+
+class FrameCache:
+    # Memory-budgeted LRU of display-ready frames keyed by (media path, frame number).
+    # Shared between the player, the scrub prefetcher and media thumbnails.
+    def __init__(self, max_bytes=FRAME_CACHE_BUDGET):
+        self.max_bytes = max_bytes
+        self.max_frame_size = None  # (width, height) frames are downscaled to fit
+        self.frames = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, frame_num):
+        key = (path, int(frame_num))
+        with self.lock:
+            frame = self.frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self.frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def contains(self, path, frame_num):
+        with self.lock:
+            return (path, int(frame_num)) in self.frames
+
+    def put(self, path, frame_num, frame):
+        key = (path, int(frame_num))
+        size = frame.nbytes
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.frames.pop(key, None)
+            if old is not None:
+                self.used_bytes -= old.nbytes
+            self.frames[key] = frame
+            self.used_bytes += size
+            while self.used_bytes > self.max_bytes:
+                _, evicted = self.frames.popitem(last=False)
+                self.used_bytes -= evicted.nbytes
+
+    def clear(self, path=None):
+        with self.lock:
+            if path is None:
+                self.frames.clear()
+                self.used_bytes = 0
+                return
+            for key in [key for key in self.frames if key[0] == path]:
+                self.used_bytes -= self.frames.pop(key).nbytes
+
+    def set_max_frame_size(self, size):
+        old = self.max_frame_size
+        self.max_frame_size = size
+        # Cached frames smaller than the new display size would look soft
+        if old is not None and (size is None or size[0] > old[0] or size[1] > old[1]):
+            self.clear()
+
+    def prepare(self, frame):
+        return prepare_display_frame(frame, self.max_frame_size)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'frames': len(self.frames),
+                'used_bytes': self.used_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hit_rate()
+            }
+
+class FrameTimings:
+    # Rolling per-stage timings of the preview pipeline (decode, convert, render,
+    # paint) plus display timestamps for the achieved frame rate. Stages are
+    # recorded from the worker threads and the GUI thread.
+    STAGES = ["decode", "convert", "render", "paint"]
+
+    def __init__(self, window=TIMING_WINDOW):
+        self.samples = {stage: deque(maxlen=window) for stage in self.STAGES}
+        self.display_times = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.samples[stage].append(seconds * 1000)
+
+    def mark_display(self):
+        with self.lock:
+            self.display_times.append(time.monotonic())
+
+    def achieved_fps(self, span=1.0):
+        # Frames displayed per second over the last span seconds
+        now = time.monotonic()
+        with self.lock:
+            recent = [t for t in self.display_times if now - t <= span]
+        if len(recent) < 2:
+            return 0.0
+        return (len(recent) - 1) / max(recent[-1] - recent[0], 1e-6)
+
+    def stage_stats(self, stage):
+        with self.lock:
+            values = np.array(self.samples[stage], dtype=np.float64)
+        if not len(values):
+            return None
+        return {
+            'count': int(len(values)),
+            'mean_ms': float(values.mean()),
+            'p95_ms': float(np.percentile(values, 95)),
+            'max_ms': float(values.max()),
+            'histogram': np.histogram(values, bins=TIMING_HISTOGRAM_EDGES_MS + [np.inf])[0].tolist()
+        }
+
+    def clear(self):
+        with self.lock:
+            for values in self.samples.values():
+                values.clear()
+            self.display_times.clear()
+
+    def dump(self, path, extra=None):
+        report = {
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'histogram_edges_ms': TIMING_HISTOGRAM_EDGES_MS + ["inf"],
+            'achieved_fps': self.achieved_fps(),
+            'stages': {stage: self.stage_stats(stage) for stage in self.STAGES}
+        }
+        report.update(extra or {})
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+def prepare_display_frame(frame, max_size=None):
+    # Display-ready frames stay BGR (shown as QImage.Format_BGR888, no colour
+    # conversion) and are downscaled towards the display size before they are
+    # cached or uploaded, so the surface paints them 1:1. Halvings go through
+    # INTER_AREA's fast 2x path, the (< 2x) remainder is bilinear.
+    if max_size is not None:
+        height, width = frame.shape[:2]
+        while width // 2 >= max_size[0] and height // 2 >= max_size[1]:
+            width, height = width // 2, height // 2
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        if width > max_size[0] or height > max_size[1]:
+            size = fit_size(width, height, max_size[0], max_size[1])
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+    return frame
+
+class FramePrefetchThread(QThread):
+    # Decodes the frames around the playhead (both directions) into the frame
+    # cache while the user scrubs. A newer request replaces the pending one.
+    def __init__(self, frame_cache, radius=SCRUB_PREFETCH_RADIUS, keyframe_indexes=None, parent=None):
+        super().__init__(parent)
+        self.frame_cache = frame_cache
+        self.radius = radius
+        self.keyframe_indexes = keyframe_indexes if keyframe_indexes is not None else {}
+        self.condition = threading.Condition()
+        self.request = None  # (path, frame_num, total_frames, backward)
+        self.running = True
+
+    def prefetch(self, path, frame_num, total_frames, backward=False):
+        # backward: warm the previous GOP instead, for stepping back frame by frame
+        with self.condition:
+            self.request = (path, int(frame_num), total_frames, backward)
+            self.condition.notify_all()
+
+    def run(self):
+        cap = None
+        cap_path = None
+        while True:
+            with self.condition:
+                while self.running and self.request is None:
+                    self.condition.wait()
+                if not self.running:
+                    break
+                path, center, total_frames, backward = self.request
+                self.request = None
+                
+            if path != cap_path:
+                if cap:
+                    cap.release()
+                cap = IndexedCapture(path)
+                cap_path = path
+            cap.index = self.keyframe_indexes.get(path)
+                
+            first = max(0, center - self.radius)
+            last = min(total_frames - 1, center + self.radius)
+            if backward:
+                first = max(0, center - REVERSE_SEGMENT_FRAMES)
+                if cap.index is not None:
+                    segment_start = cap.index.preceding_keyframe(center)
+                    first = max(first, cap.index.preceding_keyframe(max(segment_start - 1, 0)))
+                last = center
+            missing = [n for n in range(first, last + 1)
+                       if not self.frame_cache.contains(path, n)]
+            if not missing:
+                continue
+                
+            # One seek, then a sequential read across the missing span. A backward
+            # span is finished even if the playhead moves on, as restarting it
+            # would seek back to its keyframe again.
+            for frame_num in range(missing[0], missing[-1] + 1):
+                if (self.request is not None and not backward) or not self.running:
+                    break
+                frame = cap.read_frame(frame_num)
+                if frame is None:
+                    break
+                if not self.frame_cache.contains(path, frame_num):
+                    self.frame_cache.put(path, frame_num, self.frame_cache.prepare(frame))
+        if cap:
+            cap.release()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.wait()
+
+class BufferedFrameThread(QThread):
+    # Produces frames sequentially ahead of playback into a bounded ring buffer.
+    # The source is only repositioned when playback actually jumps. Frames are
+    # produced every `step` frames (negative steps play in reverse).
+    # Subclasses implement open_source / produce_frame / close_source.
+    frame_ready = pyqtSignal(int, object)
+
+    def __init__(self, buffer_size=PREFETCH_FRAMES, parent=None):
+        super().__init__(parent)
+        self.buffer_size = buffer_size
+        self.frames = deque()  # (frame_num, frame)
+        self.condition = threading.Condition()
+        self.decode_pos = 0  # next frame the thread will produce
+        self.seek_target = None
+        self.end_of_stream = False
+        self.running = True
+        self.restarting = False  # producing the first frame after a jump
+        self.step = 1
+        self.keyframes_only = False
+
+    def open_source(self):
+        return True
+
+    def produce_frame(self, frame_num):
+        return None
+
+    def close_source(self):
+        pass
+
+    def next_frame(self, frame_num):
+        return frame_num + self.step
+
+    def align(self, frame_num):
+        # First frame actually produced when (re)starting at frame_num
+        return frame_num
+
+    def spacing(self):
+        # Typical distance in frames between produced frames
+        return abs(self.step)
+
+    def buffer_limit(self):
+        return self.buffer_size
+
+    def before(self, a, b):
+        # True if frame a comes before frame b in the playback direction
+        return a < b if self.step > 0 else a > b
+
+    def set_stride(self, step, frame_num, keyframes_only=False):
+        # Change speed/direction; frame_num is the first frame to produce
+        with self.condition:
+            if step != self.step or keyframes_only != self.keyframes_only:
+                self.step = step
+                self.keyframes_only = keyframes_only
+                self.restart_at(frame_num)
+                return
+        self.seek(frame_num)
+
+    def run(self):
+        if not self.open_source():
+            return
+        while True:
+            with self.condition:
+                while self.running and self.seek_target is None and (
+                        self.end_of_stream or len(self.frames) >= self.buffer_limit()):
+                    self.condition.wait()
+                if not self.running:
+                    break
+                target = self.seek_target
+                self.seek_target = None
+                self.restarting = target is not None
+                frame_num = self.decode_pos if target is None else target
+                
+            frame = self.produce_frame(frame_num) if frame_num >= 0 else None
+            
+            with self.condition:
+                self.restarting = False
+                if self.seek_target is not None:
+                    # A jump was requested while decoding; discard this frame
+                    continue
+                if frame is None:
+                    self.end_of_stream = True
+                else:
+                    self.frames.append((frame_num, frame))
+                    self.decode_pos = self.next_frame(frame_num)
+                self.condition.notify_all()
+            if frame is not None:
+                self.frame_ready.emit(frame_num, frame)
+        self.close_source()
+
+    def seek(self, frame_num):
+        with self.condition:
+            # Drop buffered frames we have already passed
+            while self.frames and self.before(self.frames[0][0], frame_num):
+                self.frames.popleft()
+            if self.frames and self.frames[0][0] == frame_num:
+                return
+            if not self.frames and frame_num == self.decode_pos and self.seek_target is None:
+                return
+            self.restart_at(frame_num)
+
+    def restart_at(self, frame_num):
+        # Caller holds self.condition
+        frame_num = self.align(frame_num)
+        self.frames.clear()
+        self.seek_target = frame_num
+        self.decode_pos = frame_num
+        self.end_of_stream = False
+        self.condition.notify_all()
+
+    def invalidate(self):
+        # Buffered frames are stale (e.g. the timeline was edited)
+        with self.condition:
+            first = self.frames[0][0] if self.frames else self.decode_pos
+            self.restart_at(first)
+
+    def take_frame(self, frame_num):
+        # Non-blocking: returns the buffered frame or None if it isn't ready yet
+        with self.condition:
+            while self.frames and self.before(self.frames[0][0], frame_num):
+                self.frames.popleft()
+            if self.frames and self.frames[0][0] == frame_num:
+                frame = self.frames.popleft()[1]
+                self.condition.notify_all()
+                return frame
+            self.jump_if_outside(frame_num)
+            return None
+
+    def take_next(self):
+        # Non-blocking: the first buffered (frame_num, frame), or None
+        with self.condition:
+            if not self.frames:
+                return None
+            entry = self.frames.popleft()
+            self.condition.notify_all()
+            return entry
+
+    def take_latest(self, frame_num):
+        # Non-blocking: the newest buffered (frame_num, frame) not past
+        # frame_num, dropping older ones. Lets playback catch up to the clock.
+        with self.condition:
+            latest = None
+            while self.frames and not self.before(frame_num, self.frames[0][0]):
+                latest = self.frames.popleft()
+            if latest is not None:
+                self.condition.notify_all()
+                return latest
+            self.jump_if_outside(frame_num)
+            return None
+
+    def jump_if_outside(self, frame_num):
+        # Caller holds self.condition
+        ahead = (frame_num - self.decode_pos) * (1 if self.step > 0 else -1)
+        spacing = max(self.spacing(), 1)
+        # A frame still being produced for the previous jump is let through, so a
+        # decoder slower than the clock shows late frames rather than none
+        if self.seek_target is None and not self.restarting and (
+                ahead < -len(self.frames) * spacing or ahead > self.buffer_limit() * spacing):
+            # Far outside the read-ahead window: jump instead of decoding through
+            self.restart_at(frame_num)
+
+    def at_end(self):
+        with self.condition:
+            return self.end_of_stream and not self.frames and self.seek_target is None
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.wait()
+
+class FrameDecoderThread(BufferedFrameThread):
+    # Decodes a single media file ahead of playback
+    def __init__(self, file_path, buffer_size=PREFETCH_FRAMES, frame_cache=None, keyframe_index=None,
+                 timings=None, parent=None):
+        super().__init__(buffer_size, parent)
+        self.file_path = file_path
+        self.keyframe_index = keyframe_index
+        self.frame_cache = frame_cache
+        self.timings = timings
+        self.cap = None
+        self.reduced_decode = True  # allow decoding straight to the display size
+        self.reduced_cap = None  # ReducedCapture for forward playback
+        self.reduced_for = None  # (frame size, reduced_decode) reduced_cap was chosen for
+        self.key_stream = None  # ffmpeg process streaming keyframes forward
+        self.key_stream_next = 0  # keyframe the stream delivers next
+        self.segment = {}  # reverse playback: decoded frames of the current GOP segment
+
+    def open_source(self):
+        self.cap = IndexedCapture(self.file_path, self.keyframe_index)
+        return self.cap.isOpened()
+
+    def close_source(self):
+        self.close_key_stream()
+        if self.reduced_cap:
+            self.reduced_cap.release()
+        if self.cap:
+            self.cap.release()
+
+    def update_reduced_cap(self):
+        # Decode straight to the display size when frames are shown much smaller
+        # than the source: at reduced resolution if the codec allows it (-lowres),
+        # or with the downscale fused into ffmpeg's colour conversion from 4x on
+        max_size = self.frame_cache.max_frame_size if self.frame_cache else None
+        if (max_size, self.reduced_decode) == self.reduced_for:
+            return
+        self.reduced_for = (max_size, self.reduced_decode)
+        if self.reduced_cap:
+            self.reduced_cap.release()
+            self.reduced_cap = None
+        if max_size is None or not self.reduced_decode:
+            return
+        source_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC)).to_bytes(4, 'little').decode('latin-1').upper()
+        lowres = 0
+        if fourcc in LOWRES_FOURCCS:
+            lowres = reduction_level(source_size, max_size, ReducedCapture.MAX_LOWRES)
+        if lowres or 1 << reduction_level(source_size, max_size, 2) >= ReducedCapture.MIN_SCALE_REDUCTION:
+            size = fit_size(source_size[0], source_size[1], max_size[0], max_size[1])
+            self.reduced_cap = ReducedCapture(self.file_path, size, source_size,
+                                              self.cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS,
+                                              lowres, self.keyframe_index)
+
+    def align(self, frame_num):
+        index = self.keyframe_index
+        if not self.keyframes_only or index is None:
+            return frame_num
+        keyframes = index.keyframes
+        if self.step > 0:
+            i = bisect.bisect_left(keyframes, frame_num)
+            return keyframes[i] if i < len(keyframes) else len(index.frame_times)
+        return index.preceding_keyframe(max(frame_num, 0))
+
+    def buffer_limit(self):
+        # Reverse playback buffers a whole segment, so the next one back is
+        # decoded while the current one plays
+        if self.step < 0 and not self.keyframes_only:
+            return max(self.buffer_size, REVERSE_SEGMENT_FRAMES)
+        return self.buffer_size
+
+    def read_reverse(self, frame_num):
+        # Each GOP is decoded forward once and then served backwards, instead
+        # of seeking back to its keyframe for every frame
+        frame = self.segment.pop(frame_num, None)
+        if frame is not None:
+            return frame
+        start = time.perf_counter()
+        self.segment = dict(self.cap.read_segment(frame_num))
+        decoded = time.perf_counter()
+        for n, decoded_frame in self.segment.items():
+            if self.frame_cache is not None:
+                decoded_frame = self.frame_cache.prepare(decoded_frame)
+                self.frame_cache.put(self.file_path, n, decoded_frame)
+            self.segment[n] = decoded_frame
+        if self.timings and self.segment:
+            self.timings.record("decode", decoded - start)
+            self.timings.record("convert", time.perf_counter() - decoded)
+        return self.segment.pop(frame_num, None)
+
+    def keyframe_size(self):
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        max_size = self.frame_cache.max_frame_size if self.frame_cache else None
+        if max_size and (width > max_size[0] or height > max_size[1]):
+            width, height = fit_size(width, height, max_size[0], max_size[1])
+        return max(2, width // 2 * 2), max(2, height // 2 * 2)
+
+    def keyframe_command(self, frame_num, single):
+        # -skip_frame nokey: the decoder never touches non-key frames
+        width, height = self.keyframe_size()
+        seconds = self.keyframe_index.time_of(frame_num) + 0.001
+        cmd = [
+            "ffmpeg", "-v", "error", "-noaccurate_seek", "-ss", f"{seconds:.3f}",
+            "-skip_frame", "nokey", "-i", self.file_path, "-an", "-vsync", "passthrough",
+            "-s", f"{width}x{height}", "-f", "rawvideo", "-pix_fmt", "bgr24", "-"
+        ]
+        if single:
+            cmd[-1:-1] = ["-frames:v", "1"]
+        return cmd, width * height * 3, (height, width, 3)
+
+    def read_keyframe(self, frame_num):
+        keyframes = self.keyframe_index.keyframes
+        if self.step < 0:
+            # Reverse: one short-lived decode per keyframe
+            self.close_key_stream()
+            cmd, size, shape = self.keyframe_command(frame_num, True)
+            data = subprocess.run(cmd, capture_output=True).stdout
+            return np.frombuffer(data, np.uint8).reshape(shape).copy() if len(data) == size else None
+        position = bisect.bisect_left(keyframes, frame_num)
+        if self.key_stream is None or not (
+                self.key_stream_next <= frame_num and
+                position - bisect.bisect_left(keyframes, self.key_stream_next) <= 8):
+            self.close_key_stream()
+            cmd, size, shape = self.keyframe_command(frame_num, False)
+            self.key_stream = (subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL),
+                               size, shape)
+            self.key_stream_next = frame_num
+        process, size, shape = self.key_stream
+        while True:
+            data = process.stdout.read(size)
+            if len(data) < size:
+                self.close_key_stream()
+                return None
+            current = self.key_stream_next
+            i = bisect.bisect_right(keyframes, current)
+            self.key_stream_next = keyframes[i] if i < len(keyframes) else len(self.keyframe_index.frame_times)
+            if current >= frame_num:
+                return np.frombuffer(data, np.uint8).reshape(shape)
+
+    def close_key_stream(self):
+        if self.key_stream:
+            process = self.key_stream[0]
+            process.kill()
+            process.stdout.close()
+            process.wait()
+            self.key_stream = None
+
+    def next_frame(self, frame_num):
+        # Keyframe-only shuttle: the next keyframe at least one step away
+        index = self.keyframe_index
+        if not self.keyframes_only or index is None:
+            return frame_num + self.step
+        keyframes = index.keyframes
+        if self.step > 0:
+            i = bisect.bisect_left(keyframes, frame_num + self.step)
+            return keyframes[i] if i < len(keyframes) else len(index.frame_times)
+        i = bisect.bisect_right(keyframes, frame_num + self.step) - 1
+        return keyframes[i] if i >= 0 else -1
+
+    def spacing(self):
+        index = self.keyframe_index
+        if self.keyframes_only and index is not None:
+            group = len(index.frame_times) // max(len(index.keyframes), 1)
+            return max(abs(self.step), group)
+        return abs(self.step)
+
+    def produce_frame(self, frame_num):
+        start = time.perf_counter()
+        if self.keyframes_only and self.keyframe_index is not None:
+            try:
+                frame = self.read_keyframe(frame_num)
+            except OSError:
+                frame = None
+            if frame is not None:
+                if self.frame_cache is not None:
+                    self.frame_cache.put(self.file_path, frame_num, frame)
+                if self.timings:
+                    self.timings.record("decode", time.perf_counter() - start)
+            return frame
+        self.close_key_stream()
+        if self.step < 0:
+            return self.read_reverse(frame_num)
+        self.segment = {}
+        self.update_reduced_cap()
+        # Frames skipped by a fast forward stride are only grab()bed, never retrieved
+        max_grab = max(abs(self.step), IndexedCapture.MAX_FORWARD_GRAB)
+        frame = None
+        reduced_failed = False
+        if self.reduced_cap:
+            try:
+                frame = self.reduced_cap.read_frame(frame_num, max_grab=max_grab)
+                reduced_failed = frame is None and not self.reduced_cap.produced
+            except OSError:
+                self.reduced_cap = None
+        if frame is None:
+            frame = self.cap.read_frame(frame_num, max_grab=max_grab)
+        if frame is None:
+            return None
+        if reduced_failed:
+            # ffmpeg started and gave nothing where OpenCV decodes the frame;
+            # don't spawn it again for every frame
+            self.reduced_cap = None
+        decoded = time.perf_counter()
+        if self.frame_cache is not None:
+            frame = self.frame_cache.prepare(frame)
+            self.frame_cache.put(self.file_path, frame_num, frame)
+        if self.timings:
+            self.timings.record("decode", decoded - start)
+            self.timings.record("convert", time.perf_counter() - decoded)
+        return frame
+
+def parse_color(hex_color):
+    # "#RRGGBB" or "#RRGGBBAA" -> (r, g, b, a)
+    hex_color = hex_color.lstrip('#')
+    try:
+        r, g, b = (int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        a = int(hex_color[6:8], 16) if len(hex_color) >= 8 else 255
+    except ValueError:
+        return 0, 0, 0, 255
+    return r, g, b, a
+
+def blend_layer(canvas, layer, x, y, alpha=None):
+    # Alpha-blend a BGR(A) layer onto the BGR canvas at (x, y), clipped to bounds
+    height, width = layer.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, canvas.shape[1]), min(y + height, canvas.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return
+    region = layer[y0 - y:y1 - y, x0 - x:x1 - x]
+    if region.shape[2] == 4:
+        weights = region[:, :, 3].astype(np.float32) * ((1.0 if alpha is None else alpha) / 255)
+        region = np.ascontiguousarray(region[:, :, :3])
+    elif alpha is None or alpha >= 1:
+        canvas[y0:y1, x0:x1] = region
+        return
+    else:
+        weights = np.full(region.shape[:2], alpha, dtype=np.float32)
+    target = canvas[y0:y1, x0:x1]
+    target[:] = cv2.blendLinear(region, np.ascontiguousarray(target), weights, 1 - weights)
+
+def trim_transparent(layer):
+    # Crop fully transparent margins off a BGRA layer -> (layer, x offset, y offset)
+    alpha = layer[:, :, 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    cols = np.flatnonzero(alpha.any(axis=0))
+    if not len(rows):
+        return layer[:1, :1], 0, 0
+    return layer[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1], int(cols[0]), int(rows[0])
+
+def fit_size(width, height, max_width, max_height):
+    scale = min(max_width / width, max_height / height)
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+def load_lut_file(path):
+    # Parse a .cube or .3dl 3D LUT -> float32 array indexed [r, g, b] with values in 0..1
+    with open(path, 'r') as f:
+        lines = [line.split('#')[0].strip() for line in f]
+    lines = [line for line in lines if line]
+    
+    if path.lower().endswith('.3dl'):
+        shaper = [int(v) for v in lines[0].split()]
+        size = len(shaper)
+        values = np.array([[float(v) for v in line.split()[:3]] for line in lines[1:1 + size ** 3]],
+                          dtype=np.float32)
+        # Blue changes fastest, output depth is 10 or 12 bit
+        values /= 4095.0 if values.max() > 1023 else 1023.0
+        return values.reshape(size, size, size, 3)
+        
+    size = 0
+    domain_min = np.zeros(3, dtype=np.float32)
+    domain_max = np.ones(3, dtype=np.float32)
+    data = []
+    for line in lines:
+        parts = line.split()
+        keyword = parts[0].upper()
+        if keyword == 'LUT_3D_SIZE':
+            size = int(parts[1])
+        elif keyword == 'DOMAIN_MIN':
+            domain_min = np.array(parts[1:4], dtype=np.float32)
+        elif keyword == 'DOMAIN_MAX':
+            domain_max = np.array(parts[1:4], dtype=np.float32)
+        elif keyword[0].isdigit() or keyword[0] in '-.':
+            data.append([float(v) for v in parts[:3]])
+    if not size or len(data) < size ** 3:
+        raise ValueError(f"Invalid or unsupported LUT file: {path}")
+    values = np.array(data[:size ** 3], dtype=np.float32)
+    values = (values - domain_min) / (domain_max - domain_min)
+    # Red changes fastest: stored as [b, g, r]
+    return values.reshape(size, size, size, 3).transpose(2, 1, 0, 3)
+
+def sample_lut(lut, points):
+    # Trilinear lookup of (n, 3) RGB points in 0..1
+    size = lut.shape[0]
+    coords = np.clip(points, 0, 1) * (size - 1)
+    low = np.minimum(np.floor(coords).astype(np.int32), size - 2)
+    frac = coords - low
+    result = np.zeros_like(points, dtype=np.float32)
+    for dr in (0, 1):
+        wr = frac[:, 0] if dr else 1 - frac[:, 0]
+        for dg in (0, 1):
+            wg = frac[:, 1] if dg else 1 - frac[:, 1]
+            for db in (0, 1):
+                wb = frac[:, 2] if db else 1 - frac[:, 2]
+                corner = lut[low[:, 0] + dr, low[:, 1] + dg, low[:, 2] + db]
+                result += corner * (wr * wg * wb)[:, None]
+    return result
+
+class FrameEffects:
+    # NumPy/OpenCV versions of the export effect chain (see process_video_clip)
+    # for BGR frames, applied in the same order as the ffmpeg filters. Per-clip
+    # derived state (key color in chroma space, resampled LUT tables) is computed
+    # once and cached.
+    LUT_BITS = 7  # precomputed LUT tables are 128^3 entries
+
+    def __init__(self):
+        self.luts = {}  # path -> uint8 lookup table
+        self.key_colors = {}  # hex color -> (u, v)
+
+    def has_effects(self, clip):
+        return any((clip.get('fade_in', 0) > 0, clip.get('fade_out', 0) > 0, clip.get('scale', 1) != 1,
+                    clip.get('rotation', 0) != 0, clip.get('opacity', 1) < 1, clip.get('bw', False),
+                    clip.get('blur', 0) > 0, clip.get('chroma_key', False), clip.get('lut', '')))
+
+    def lut_table(self, path):
+        table = self.luts.get(path)
+        if table is None:
+            lut = load_lut_file(path)
+            steps = 1 << self.LUT_BITS
+            # Sample at the centre of each quantization bucket
+            axis = (np.arange(steps, dtype=np.float32) + 0.5) / steps
+            r, g, b = np.meshgrid(axis, axis, axis, indexing='ij')
+            points = np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+            table = np.clip(sample_lut(lut, points) * 255 + 0.5, 0, 255).astype(np.uint8)
+            # Output in BGR order like the frames
+            table = np.ascontiguousarray(table[:, ::-1])
+            self.luts[path] = table
+        return table
+
+    def key_color(self, color):
+        uv = self.key_colors.get(color)
+        if uv is None:
+            r, g, b, _ = parse_color(color)
+            # BT.601 limited range, like ffmpeg's RGB_TO_U_CCIR / RGB_TO_V_CCIR
+            u = -0.14822 * r - 0.29099 * g + 0.43922 * b + 128
+            v = 0.43922 * r - 0.36779 * g - 0.07142 * b + 128
+            uv = (np.float32(u), np.float32(v))
+            self.key_colors[color] = uv
+        return uv
+
+    def fade(self, frame, clip, local_time):
+        factor = 1.0
+        duration = clip.get('duration', 0)
+        if clip.get('fade_in', 0) > 0:
+            factor = min(factor, local_time / clip['fade_in'])
+        if clip.get('fade_out', 0) > 0:
+            factor = min(factor, (duration - local_time) / clip['fade_out'])
+        factor = min(max(factor, 0.0), 1.0)
+        if factor >= 1.0:
+            return frame
+        return cv2.convertScaleAbs(frame, alpha=factor)
+
+    def rotate(self, frame, degrees):
+        # ffmpeg rotate: clockwise, same output size, black fill
+        height, width = frame.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -degrees, 1.0)
+        return cv2.warpAffine(frame, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+    def black_and_white(self, frame):
+        # hue=s=0 keeps luma only
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+    def box_blur(self, frame, radius):
+        # boxblur works on yuv420p planes and applies the box filter twice
+        # (luma_power=2). The chroma radius is in half-resolution chroma pixels,
+        # which is twice the luma radius at full resolution.
+        ycrcb = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb)
+        planes = []
+        for plane, plane_radius in zip(cv2.split(ycrcb), (radius, 2 * radius, 2 * radius)):
+            size = (2 * plane_radius + 1, 2 * plane_radius + 1)
+            plane = cv2.blur(plane, size, borderType=cv2.BORDER_REPLICATE)
+            planes.append(cv2.blur(plane, size, borderType=cv2.BORDER_REPLICATE))
+        return cv2.cvtColor(cv2.merge(planes), cv2.COLOR_YCrCb2BGR)
+
+    def chroma_key_alpha(self, frame, clip):
+        key_u, key_v = self.key_color(clip.get('chroma_color', '#00FF00'))
+        similarity = clip.get('chroma_similarity', 0.1)
+        blend = clip.get('chroma_blend', 0.1)
+        # OpenCV's full-range Cr/Cb scaled to limited range chroma
+        ycrcb = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb).astype(np.float32)
+        scale = np.float32(224 / 255)
+        du = (ycrcb[:, :, 2] - 128) * scale + 128 - key_u
+        dv = (ycrcb[:, :, 1] - 128) * scale + 128 - key_v
+        diff = np.sqrt((du * du + dv * dv) / np.float32(255 * 255 * 2))
+        # ffmpeg averages the difference over a 3x3 neighbourhood
+        diff = cv2.blur(diff, (3, 3))
+        if blend > 0.0001:
+            return np.clip((diff - similarity) / blend, 0, 1)
+        return (diff > similarity).astype(np.float32)
+
+    def apply_lut(self, frame, path):
+        table = self.lut_table(path)
+        shift = 8 - self.LUT_BITS
+        index = ((frame[:, :, 2].astype(np.int32) >> shift) << (2 * self.LUT_BITS)) | \
+                ((frame[:, :, 1].astype(np.int32) >> shift) << self.LUT_BITS) | \
+                (frame[:, :, 0] >> shift)
+        return table[index]
+
+    def apply(self, frame, clip, local_time, resolution_scale=1.0):
+        # frame: BGR uint8 layer. resolution_scale: layer size / source size,
+        # used to keep pixel-sized parameters (blur radius) consistent.
+        # BGRA input (stills) keeps its alpha through the geometric effects.
+        # Returns a BGR or BGRA layer.
+        alpha = None
+        if frame.shape[2] == 4:
+            alpha = frame[:, :, 3].astype(np.float32) / 255
+            frame = np.ascontiguousarray(frame[:, :, :3])
+        if clip.get('fade_in', 0) > 0 or clip.get('fade_out', 0) > 0:
+            frame = self.fade(frame, clip, local_time)
+        if clip.get('scale', 1) != 1:
+            height, width = frame.shape[:2]
+            scale = clip['scale']
+            size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            frame = cv2.resize(frame, size, interpolation=interpolation)
+            if alpha is not None:
+                alpha = cv2.resize(alpha, size, interpolation=interpolation)
+        if clip.get('rotation', 0) != 0:
+            frame = self.rotate(frame, clip['rotation'])
+            if alpha is not None:
+                alpha = self.rotate(alpha, clip['rotation'])
+        if clip.get('opacity', 1) < 1:
+            if alpha is None:
+                alpha = np.full(frame.shape[:2], clip['opacity'], dtype=np.float32)
+            else:
+                alpha *= clip['opacity']
+        if clip.get('bw', False):
+            frame = self.black_and_white(frame)
+        if clip.get('blur', 0) > 0:
+            radius = max(1, int(round(clip['blur'] * resolution_scale)))
+            frame = self.box_blur(frame, radius)
+        if clip.get('chroma_key', False):
+            key_alpha = self.chroma_key_alpha(frame, clip)
+            alpha = key_alpha if alpha is None else alpha * key_alpha
+        if clip.get('lut', ''):
+            try:
+                frame = self.apply_lut(frame, clip['lut'])
+            except (OSError, ValueError, IndexError):
+                pass
+        if alpha is None:
+            return frame
+        return np.dstack([frame, (alpha * 255 + 0.5).astype(np.uint8)])
+
+class TimelineCompositor:
+    # Composites the active clips of all tracks at a timeline time into one
+    # BGR frame at a reduced preview resolution. Higher tracks draw on top.
+    MAX_CAPTURES = 8  # open decoders, least recently used closed first
+
+    def __init__(self, clips_provider, settings_provider, preview_path=None,
+                 frame_cache=None, keyframe_indexes=None):
+        self.clips_provider = clips_provider
+        self.settings_provider = settings_provider
+        self.preview_path = preview_path or (lambda path: path)
+        self.frame_cache = frame_cache
+        self.keyframe_indexes = keyframe_indexes if keyframe_indexes is not None else {}
+        self.scale = 0.5
+        self.effects = FrameEffects()
+        self.captures = OrderedDict()  # decode path -> IndexedCapture, LRU
+        self.stills = {}  # (kind, key, size) -> BGRA image
+        self.timings = None  # FrameTimings of the player showing this compositor
+        self.lock = threading.Lock()
+
+    def set_scale(self, scale):
+        with self.lock:
+            self.scale = scale
+            self.stills.clear()
+
+    def canvas_size(self):
+        width, height = self.settings_provider()['resolution']
+        return max(2, int(width * self.scale) // 2 * 2), max(2, int(height * self.scale) // 2 * 2)
+
+    def fps(self):
+        return self.settings_provider()['fps']
+
+    def duration(self):
+        return self.clips_provider().end_time()
+
+    def active_clips(self, t):
+        return [clip for clip in self.clips_provider().active(t) if clip['type'] != 'audio']
+
+    def render(self, t):
+        with self.lock:
+            width, height = self.canvas_size()
+            r, g, b, _ = parse_color(self.settings_provider().get('background', '#000000'))
+            canvas = np.empty((height, width, 3), dtype=np.uint8)
+            canvas[:] = (b, g, r)
+            for clip in self.active_clips(t):
+                if clip['type'] == 'video':
+                    self.draw_video(canvas, clip, t)
+                elif clip['type'] == 'image':
+                    self.draw_image(canvas, clip, t)
+                elif clip['type'] == 'text':
+                    self.draw_text(canvas, clip)
+                elif clip['type'] == 'sticker':
+                    self.draw_sticker(canvas, clip)
+                elif clip['type'] == 'transition':
+                    canvas[:] = 0
+            return canvas
+
+    def source_frame(self, clip, t):
+        # Display-ready frame of a video clip at timeline time t
+        path = self.preview_path(clip['path'])
+        cap = self.captures.pop(path, None)
+        if cap is None:
+            cap = IndexedCapture(path)
+        self.captures[path] = cap
+        while len(self.captures) > self.MAX_CAPTURES:
+            self.captures.popitem(last=False)[1].release()
+        # Proxies are intra-frame, so only originals need the keyframe index
+        index = self.keyframe_indexes.get(clip['path']) if path == clip['path'] else None
+        cap.index = index
+        
+        src_time = clip.get('start_trim', 0) + (t - clip['start']) * clip.get('speed', 1)
+        if index is not None:
+            frame_num = index.frame_at_time(src_time)
+        else:
+            fps = clip.get('fps') or cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+            frame_num = int(src_time * fps)
+            
+        frame = self.frame_cache.get(path, frame_num) if self.frame_cache else None
+        if frame is None:
+            start = time.perf_counter()
+            frame = cap.read_frame(frame_num)
+            if frame is None:
+                return None
+            decoded = time.perf_counter()
+            if self.frame_cache:
+                frame = self.frame_cache.prepare(frame)
+                self.frame_cache.put(path, frame_num, frame)
+            if self.timings:
+                self.timings.record("decode", decoded - start)
+                self.timings.record("convert", time.perf_counter() - decoded)
+        return frame
+
+    def draw_video(self, canvas, clip, t):
+        frame = self.source_frame(clip, t)
+        if frame is None:
+            return
+        height, width = canvas.shape[:2]
+        fit_w, fit_h = fit_size(frame.shape[1], frame.shape[0], width, height)
+        layer = cv2.resize(frame, (fit_w, fit_h), interpolation=cv2.INTER_AREA)
+        if self.effects.has_effects(clip):
+            # Blur radii are in source pixels
+            source_width = clip.get('width') or frame.shape[1]
+            layer = self.effects.apply(layer, clip, t - clip['start'], fit_w / source_width)
+        self.blend_centered(canvas, layer)
+
+    def blend_centered(self, canvas, layer):
+        height, width = canvas.shape[:2]
+        blend_layer(canvas, layer, (width - layer.shape[1]) // 2, (height - layer.shape[0]) // 2)
+
+    def load_bgra(self, path):
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            return None
+        if image.ndim == 2:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+        if image.shape[2] == 4:
+            return image
+        return cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+
+    def draw_image(self, canvas, clip, t):
+        height, width = canvas.shape[:2]
+        key = ('image', clip['path'], (width, height))
+        entry = self.stills.get(key)
+        if entry is None:
+            image = self.load_bgra(clip['path'])
+            if image is None:
+                return
+            fit_w, fit_h = fit_size(image.shape[1], image.shape[0], width, height)
+            entry = (cv2.resize(image, (fit_w, fit_h), interpolation=cv2.INTER_AREA), fit_w / image.shape[1])
+            self.stills[key] = entry
+        layer, resolution_scale = entry
+        if self.effects.has_effects(clip):
+            layer = self.effects.apply(layer, clip, t - clip['start'], resolution_scale)
+        self.blend_centered(canvas, layer)
+
+    def draw_text(self, canvas, clip):
+        height, width = canvas.shape[:2]
+        fields = ('text', 'font_size', 'font_file', 'font_color', 'bg_color', 'position', 'shadow',
+                  'shadow_color', 'shadow_offset', 'outline', 'outline_color', 'outline_width')
+        key = ('text', tuple(clip.get(field) for field in fields), (width, height))
+        entry = self.stills.get(key)
+        if entry is None:
+            # Text layers are mostly transparent; keep only the drawn area
+            entry = trim_transparent(self.render_text(clip, width, height))
+            self.stills[key] = entry
+        layer, x, y = entry
+        blend_layer(canvas, layer, x, y)
+
+    def render_text(self, clip, width, height):
+        text = clip.get('text', "Sample Text")
+        font_size = max(1, int(clip.get('font_size', 48) * self.scale))
+        font_file = clip.get('font_file', "")
+        try:
+            if font_file and os.path.exists(font_file):
+                font = ImageFont.truetype(font_file, font_size)
+            else:
+                font = ImageFont.load_default(size=font_size)
+        except (OSError, TypeError):
+            font = ImageFont.load_default()
             
-        menu.exec(self.mapToGlobal(pos))
+        img = Image.new('RGBA', (width, height), parse_color(clip.get('bg_color', "#00000000")))
+        draw = ImageDraw.Draw(img)
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        text_w, text_h = right - left, bottom - top
+        margin = max(1, int(10 * self.scale))
+        position = clip.get('position', "center")
+        x = {"left": margin, "right": width - text_w - margin}.get(
+            position.split('-')[-1], (width - text_w) // 2)
+        y = {"top": margin, "bottom": height - text_h - margin}.get(
+            position.split('-')[0], (height - text_h) // 2)
+        x, y = x - left, y - top
+        
+        if clip.get('shadow', False):
+            offset = max(1, int(clip.get('shadow_offset', 2) * self.scale))
+            draw.text((x + offset, y + offset), text, fill=clip.get('shadow_color', "#000000"), font=font)
+        outline_width = clip.get('outline_width', 1)
+        if clip.get('outline', False) and outline_width > 0:
+            for dx in [-outline_width, 0, outline_width]:
+                for dy in [-outline_width, 0, outline_width]:
+                    if dx != 0 or dy != 0:
+                        draw.text((x + dx, y + dy), text, fill=clip.get('outline_color', "#000000"), font=font)
+        draw.text((x, y), text, fill=clip.get('font_color', "#FFFFFF"), font=font)
+        return cv2.cvtColor(np.array(img), cv2.COLOR_RGBA2BGRA)
+
+    def draw_sticker(self, canvas, clip):
+        key = ('sticker', (clip['path'], clip.get('scale', 1.0), clip.get('rotation', 0)), self.scale)
+        layer = self.stills.get(key)
+        if layer is None:
+            image = self.load_bgra(clip['path'])
+            if image is None:
+                return
+            scale = clip.get('scale', 1.0) * self.scale
+            image = cv2.resize(image, (max(1, int(image.shape[1] * scale)), max(1, int(image.shape[0] * scale))),
+                               interpolation=cv2.INTER_AREA)
+            rotation = clip.get('rotation', 0)
+            if rotation:
+                # Expand the canvas like ffmpeg's rotw/roth so corners aren't cut off
+                h, w = image.shape[:2]
+                matrix = cv2.getRotationMatrix2D((w / 2, h / 2), -rotation, 1.0)
+                cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+                new_w, new_h = int(h * sin + w * cos), int(h * cos + w * sin)
+                matrix[0, 2] += new_w / 2 - w / 2
+                matrix[1, 2] += new_h / 2 - h / 2
+                image = cv2.warpAffine(image, matrix, (new_w, new_h), borderValue=(0, 0, 0, 0))
+            layer = image
+            self.stills[key] = layer
+        x = int(clip.get('x', 0) * self.scale)
+        y = int(clip.get('y', 0) * self.scale)
+        blend_layer(canvas, layer, x, y, clip.get('opacity', 1.0))
+
+    def close(self):
+        with self.lock:
+            for cap in self.captures.values():
+                cap.release()
+            self.captures.clear()
+            self.stills.clear()
+
+class PreviewRenderThread(BufferedFrameThread):
+    # Renders composited timeline frames ahead of playback on a worker thread
+    def __init__(self, compositor, buffer_size=PREFETCH_FRAMES, timings=None, render_cache=None,
+                 parent=None):
+        super().__init__(buffer_size, parent)
+        self.compositor = compositor
+        self.timings = timings
+        self.render_cache = render_cache
+
+    def produce_frame(self, frame_num):
+        fps = self.compositor.fps()
+        t = frame_num / fps
+        if t >= self.compositor.duration():
+            return None
+        start = time.perf_counter()
+        # Sections rendered with "Render Preview" play from their cached file
+        frame = self.render_cache.read(frame_num) if self.render_cache else None
+        if frame is not None:
+            if self.timings:
+                self.timings.record("decode", time.perf_counter() - start)
+            return frame
+        frame = self.compositor.render(t)
+        if self.timings:
+            self.timings.record("render", time.perf_counter() - start)
+        return frame
+
+    def close_source(self):
+        if self.render_cache:
+            self.render_cache.close()
+
+def clip_needs_render(clip):
+    # Effects that generally can't be previewed in real time
+    return clip['type'] != 'audio' and (
+        clip.get('chroma_key', False) or bool(clip.get('lut', '')) or clip.get('blur', 0) > 0)
+
+class PreviewRenderCache:
+    # Rendered timeline preview, cached per RENDER_CHUNK_SECONDS chunk as
+    # intra-frame (MJPEG) files named by a signature of everything that affects
+    # the chunk's pixels. Editing a clip changes the signature of the chunks it
+    # overlaps, so only those fall back to live compositing; undoing the edit
+    # makes the old render valid again.
+    def __init__(self, compositor):
+        self.compositor = compositor
+        self.valid = {}  # chunk -> rendered file
+        self.heavy = set()  # chunks overlapping clip_needs_render clips
+        self.lock = threading.Lock()
+        self.reader = None  # (path, capture, next frame offset), used by the render thread
+
+    def chunk_frames(self, fps=None):
+        return max(1, int(round(RENDER_CHUNK_SECONDS * (fps or self.compositor.fps()))))
+
+    @staticmethod
+    def signatures(clips, settings, scale, start_chunk=0, end_chunk=None):
+        # chunk -> (signature, heavy) for the chunks start_chunk..end_chunk
+        fps = settings['fps']
+        chunk_frames = max(1, int(round(RENDER_CHUNK_SECONDS * fps)))
+        chunk_seconds = chunk_frames / fps
+        duration = clips.end_time()
+        last_chunk = int(np.ceil(duration * fps / chunk_frames))
+        end_chunk = last_chunk if end_chunk is None else min(end_chunk, last_chunk)
+        header = json.dumps([settings['fps'], list(settings['resolution']),
+                             settings.get('background', '#000000'), scale, chunk_frames])
+        overlapping = {chunk: [] for chunk in range(start_chunk, end_chunk)}
+        heavy = set()
+        # A chunk of slack either side; the chunk arithmetic below decides
+        candidates = clips.overlapping((start_chunk - 1) * chunk_seconds, (end_chunk + 1) * chunk_seconds)
+        for clip in sorted(candidates, key=lambda clip: clip['id']):
+            if clip['type'] == 'audio' or clip['duration'] <= 0:
+                continue
+            first = max(int(clip['start'] // chunk_seconds), start_chunk)
+            last = min(int(np.ceil((clip['start'] + clip['duration']) / chunk_seconds)), end_chunk)
+            if first >= last:
+                continue
+            data = json.dumps(clip, sort_keys=True)
+            for chunk in range(first, last):
+                overlapping[chunk].append(data)
+                if clip_needs_render(clip):
+                    heavy.add(chunk)
+        result = {}
+        for chunk, items in overlapping.items():
+            digest = hashlib.sha1(f"{header}|{chunk}|{'|'.join(items)}".encode('utf-8')).hexdigest()
+            result[chunk] = (digest, chunk in heavy)
+        return result
+
+    @staticmethod
+    def chunk_path(signature):
+        return os.path.join(RENDER_CACHE_DIR, signature + ".avi")
+
+    @staticmethod
+    def prune(max_bytes=RENDER_CACHE_BUDGET):
+        # Edits orphan the chunks rendered for the old clips, so the directory
+        # only grows; the least recently rendered or used files go first
+        try:
+            entries = list(os.scandir(RENDER_CACHE_DIR))
+        except OSError:
+            return
+        files = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def refresh(self, ranges=None):
+        # Re-validate the chunks against the current clip model: all of them, or
+        # only those overlapping the edited (start, end) ranges
+        compositor = self.compositor
+        clips = compositor.clips_provider()
+        settings = compositor.settings_provider()
+        chunk_seconds = self.chunk_frames(settings['fps']) / settings['fps']
+        last_chunk = int(np.ceil(clips.end_time() / chunk_seconds))
+        if ranges is None:
+            spans = [(0, last_chunk)]
+        else:
+            spans = [(int(start // chunk_seconds), max(int(np.ceil(end / chunk_seconds)), int(start // chunk_seconds) + 1))
+                     for start, end in ranges]
+        with self.lock:
+            valid = {} if ranges is None else {chunk: path for chunk, path in self.valid.items() if chunk < last_chunk}
+            heavy = set() if ranges is None else {chunk for chunk in self.heavy if chunk < last_chunk}
+        for first, last in spans:
+            for chunk in range(first, last):
+                valid.pop(chunk, None)
+                heavy.discard(chunk)
+            for chunk, (signature, is_heavy) in self.signatures(clips, settings, compositor.scale,
+                                                                first, last).items():
+                path = self.chunk_path(signature)
+                if os.path.exists(path):
+                    valid[chunk] = path
+                elif is_heavy:
+                    heavy.add(chunk)
+        with self.lock:
+            self.valid = valid
+            self.heavy = heavy
+
+    def read(self, frame_num):
+        # Cached frame or None; called from the preview render thread
+        chunk_frames = self.chunk_frames()
+        chunk, offset = divmod(frame_num, chunk_frames)
+        with self.lock:
+            path = self.valid.get(chunk)
+        if path is None:
+            return None
+        if self.reader is None or self.reader[0] != path:
+            self.close()
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                return None
+            self.reader = (path, cap, 0)
+        path, cap, position = self.reader
+        if offset != position:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, offset)
+        ret, frame = cap.read()
+        self.reader = (path, cap, offset + 1)
+        return frame if ret else None
+
+    def ranges(self):
+        # (start seconds, end seconds, "rendered" or "unrendered") for the render bar
+        chunk_seconds = self.chunk_frames() / self.compositor.fps()
+        with self.lock:
+            states = {chunk: "rendered" for chunk in self.valid}
+            states.update({chunk: "unrendered" for chunk in self.heavy})
+        ranges = []
+        for chunk in sorted(states):
+            state = states[chunk]
+            if ranges and ranges[-1][2] == state and ranges[-1][1] == chunk:
+                ranges[-1][1] = chunk + 1
+            else:
+                ranges.append([chunk, chunk + 1, state])
+        return [(first * chunk_seconds, last * chunk_seconds, state) for first, last, state in ranges]
+
+    def close(self):
+        if self.reader:
+            self.reader[1].release()
+            self.reader = None
+
+class RenderPreviewThread(QThread):
+    # Renders the not yet cached chunks of a timeline range in the background.
+    # Works on a snapshot of the clips so edits during rendering can't mix into
+    # a chunk; a chunk edited meanwhile simply won't match its file.
+    chunk_rendered = pyqtSignal(int, int)  # chunks done, chunks to render
+
+    def __init__(self, clips, settings, scale, start, end, preview_path=None,
+                 keyframe_indexes=None, parent=None):
+        super().__init__(parent)
+        self.clips = ClipStore(json.loads(json.dumps(list(clips))))
+        self.settings = dict(settings)
+        self.scale = scale
+        self.start_time = start
+        self.end_time = end
+        self.preview_path = preview_path
+        self.keyframe_indexes = keyframe_indexes
+        self.running = True
+        self.error_message = None  # set when rendering stopped on an error
+
+    def pending_chunks(self):
+        fps = self.settings['fps']
+        chunk_seconds = max(1, int(round(RENDER_CHUNK_SECONDS * fps))) / fps
+        first = int(self.start_time // chunk_seconds)
+        last = int(np.ceil(self.end_time / chunk_seconds))
+        signatures = PreviewRenderCache.signatures(self.clips, self.settings, self.scale, first, last)
+        pending = []
+        for chunk, (signature, _) in sorted(signatures.items()):
+            path = PreviewRenderCache.chunk_path(signature)
+            if not os.path.exists(path):
+                pending.append((chunk, signature))
+                continue
+            try:
+                os.utime(path)  # still in use: pruned last
+            except OSError:
+                pass
+        return pending
+
+    def run(self):
+        chunks = self.pending_chunks()
+        compositor = TimelineCompositor(lambda: self.clips, lambda: self.settings,
+                                        preview_path=self.preview_path,
+                                        keyframe_indexes=self.keyframe_indexes)
+        compositor.set_scale(self.scale)
+        fps = self.settings['fps']
+        chunk_frames = max(1, int(round(RENDER_CHUNK_SECONDS * fps)))
+        duration = compositor.duration()
+        size = compositor.canvas_size()
+        os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+        PreviewRenderCache.prune()
+        writer = None
+        temp_path = None
+        try:
+            for done, (chunk, signature) in enumerate(chunks):
+                path = PreviewRenderCache.chunk_path(signature)
+                temp_path = path + ".part.avi"
+                writer = cv2.VideoWriter(temp_path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+                if not writer.isOpened():
+                    # Every further chunk would fail the same way (no codec, unwritable cache)
+                    self.error_message = f"Preview render failed: cannot write {temp_path}"
+                    return
+                writer.set(cv2.VIDEOWRITER_PROP_QUALITY, 90)
+                for frame_num in range(chunk * chunk_frames, (chunk + 1) * chunk_frames):
+                    t = frame_num / fps
+                    if t >= duration or not self.running:
+                        break
+                    writer.write(compositor.render(t))
+                writer.release()
+                if not self.running:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    return
+                os.replace(temp_path, path)
+                self.chunk_rendered.emit(done + 1, len(chunks))
+        except Exception as e:
+            # A clip failing to decode or composite stops the render, reported like a writer failure
+            self.error_message = f"Preview render failed: {e}"
+            if writer is not None:
+                writer.release()
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+        finally:
+            compositor.close()
+
+    def stop(self):
+        self.running = False
+        self.wait()
+
+class FrameSurface(QWidget):
+    # Paints the current frame straight from its NumPy buffer: no QPixmap
+    # conversion and no scene items are created per frame
+    resized = pyqtSignal(QSize)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.background = QColor(30, 30, 30)
+        self.frame = None  # keeps the buffer behind self.image alive
+        self.image = None
+        self.timings = None
+        self.overlay = []  # performance overlay text lines
+
+    def set_frame(self, frame):
+        if not frame.flags['C_CONTIGUOUS']:
+            frame = np.ascontiguousarray(frame)
+        height, width = frame.shape[:2]
+        self.frame = frame
+        self.image = QImage(frame.data, width, height, frame.strides[0], QImage.Format.Format_BGR888)
+        self.update()
+
+    def clear(self):
+        self.frame = None
+        self.image = None
+        self.update()
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.background)
+        if self.image is not None:
+            width, height = fit_size(self.image.width(), self.image.height(), self.width(), self.height())
+            target = QRectF((self.width() - width) / 2, (self.height() - height) / 2, width, height)
+            if width != self.image.width():
+                painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawImage(target, self.image)
+            if self.timings:
+                self.timings.record("paint", time.perf_counter() - start)
+        if self.overlay:
+            self.draw_overlay(painter)
+        painter.end()
+
+    def draw_overlay(self, painter):
+        font = QFont("Monospace", 9)
+        font.setStyleHint(QFont.StyleHint.TypeWriter)
+        painter.setFont(font)
+        metrics = QFontMetrics(font)
+        line_height = metrics.height()
+        width = max(metrics.horizontalAdvance(line) for line in self.overlay) + 16
+        painter.fillRect(QRectF(8, 8, width, line_height * len(self.overlay) + 12), QColor(0, 0, 0, 170))
+        painter.setPen(QColor(120, 255, 120))
+        for i, line in enumerate(self.overlay):
+            painter.drawText(16, 14 + metrics.ascent() + i * line_height, line)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resized.emit(event.size())
 
 class VideoPlayerWidget(QWidget):
     frame_changed = pyqtSignal(float)  # Signal to emit current time
+    playback_stopped = pyqtSignal(int, int)  # frames shown, frames dropped
+    resolution_changed = pyqtSignal()  # timeline preview scale changed
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, frame_cache=None, keyframe_indexes=None):
         super().__init__(parent)
         self.setMinimumSize(800, 450)
         self.setStyleSheet("background-color: #1e1e1e;")
         
-        self.scene = QGraphicsScene()
-        self.view = QGraphicsView(self.scene)
-        self.view.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.view.setRenderHint(QPainter.RenderHint.Antialiasing)
-        self.view.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
-        self.view.setStyleSheet("border: none;")
+        self.surface = FrameSurface()
+        self.surface.resized.connect(self.update_display_size)
 
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(self.view)
+        layout.addWidget(self.surface)
         self.setLayout(layout)
 
         # Control bar
@@ -792,25 +3837,85 @@ class VideoPlayerWidget(QWidget):
         self.time_label.setStyleSheet("color: #cccccc;")
         control_layout.addWidget(self.time_label)
         
+        # Shuttle speed, shown when not playing forward at 1x
+        self.speed_label = QLabel("")
+        self.speed_label.setStyleSheet("color: #ffcc00; font-weight: bold;")
+        control_layout.addWidget(self.speed_label)
+        
+        # Preview source: the loaded clip or the composed timeline
+        self.source_combo = QComboBox()
+        self.source_combo.addItems(["Clip", "Timeline"])
+        self.source_combo.setEnabled(False)
+        self.source_combo.currentTextChanged.connect(
+            lambda text: self.set_timeline_mode(text == "Timeline"))
+        control_layout.addWidget(self.source_combo)
+        
+        # Preview resolution; Auto picks the smallest that still fills the display
+        self.resolution_combo = QComboBox()
+        self.resolution_combo.addItems(["Auto"] + list(PREVIEW_SCALES.keys()))
+        self.resolution_combo.setCurrentText("Auto")
+        self.resolution_combo.currentTextChanged.connect(self.set_preview_resolution)
+        control_layout.addWidget(self.resolution_combo)
+        
         layout.addWidget(control_frame)
 
+        # Ticks faster than the frame rate; which frame is due is decided by the
+        # playback clock, not by counting ticks
         self.timer = QTimer()
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.timer.timeout.connect(self.update_frame)
         self.is_playing = False
+        self.play_speed = 1  # frames of media per frame of real time; negative plays in reverse
+        self.clock_start = 0.0  # time.monotonic() when the clock was (re)started
+        self.clock_frame = 0  # frame on screen at clock_start
+        self.clock_origin = 0.0  # media time of clock_frame
+        self.frames_shown = 0
+        self.dropped_frames = 0
+        
+        # Frame timing instrumentation and the optional overlay showing it
+        self.timings = FrameTimings()
+        self.surface.timings = self.timings
+        self.overlay_timer = QTimer()
+        self.overlay_timer.timeout.connect(self.update_overlay)
+        self.step_timer = QTimer()  # polls the cache for a backward step's frame
+        self.step_timer.setInterval(10)
+        self.step_timer.timeout.connect(self.show_stepped_frame)
+        self.step_deadline = 0
+        self.step_tries = 0
         self.video_cap = None
+        self.video_path = None
+        self.decoder = None
+        self.frame_cache = frame_cache if frame_cache is not None else FrameCache()
+        self.keyframe_indexes = keyframe_indexes if keyframe_indexes is not None else {}
+        self.prefetcher = FramePrefetchThread(self.frame_cache, keyframe_indexes=self.keyframe_indexes)
+        self.prefetcher.start()
+        self.compositor = None
+        self.render_cache = None
+        self.display_size = None  # surface size in device pixels
+        self.timeline_mode = False
+        self.pending_frame = None
         self.current_frame_num = 0
         self.total_frames = 0
         self.fps = 30
         self.video_loaded = False
 
     def load_video(self, file_path):
+        if self.timeline_mode:
+            self.source_combo.blockSignals(True)
+            self.source_combo.setCurrentText("Clip")
+            self.source_combo.blockSignals(False)
+            self.timeline_mode = False
+        if self.is_playing:
+            self.toggle_play()
+        self.stop_decoder()
         if self.video_cap:
             self.video_cap.release()
             self.video_loaded = False
 
-        self.video_cap = cv2.VideoCapture(file_path)
+        self.video_cap = IndexedCapture(file_path, self.keyframe_indexes.get(file_path))
         if not self.video_cap.isOpened():
             return False
+        self.video_path = file_path
 
         self.total_frames = int(self.video_cap.get(cv2.CAP_PROP_FRAME_COUNT))
         self.fps = self.video_cap.get(cv2.CAP_PROP_FPS)
@@ -820,73 +3925,381 @@ class VideoPlayerWidget(QWidget):
         self.time_slider.setRange(0, self.total_frames)
         duration = self.total_frames / self.fps
         self.time_label.setText(f"00:00:00 / {self.format_time(duration)}")
-        self.show_frame(0)
         self.video_loaded = True
+        self.apply_preview_resolution()
+        self.show_frame(0)
         return True
 
+    def has_source(self):
+        return self.timeline_mode or (self.video_cap is not None and self.video_loaded)
+
     def show_frame(self, frame_num):
-        if not self.video_cap or not self.video_loaded:
+        if not self.has_source():
             return
 
         # Convert to integer frame number
         frame_num = int(frame_num)
 
         # Ensure frame number is within valid range
+        if frame_num >= self.total_frames:
+            frame_num = self.total_frames - 1
         if frame_num < 0:
             frame_num = 0
-        elif frame_num >= self.total_frames:
-            frame_num = self.total_frames - 1
             
+        if self.timeline_mode:
+            if self.is_playing:
+                self.start_clock(frame_num)
+            # Rendered on the worker thread; shown from on_frame_ready
+            self.pending_frame = frame_num
+            self.decoder.seek(frame_num)
+            frame = self.decoder.take_frame(frame_num)
+            if frame is not None:
+                self.pending_frame = None
+                self.display_frame(frame_num, frame)
+            return
+            
+        frame = self.frame_cache.get(self.video_path, frame_num)
+        if frame is None:
+            start = time.perf_counter()
+            frame = self.video_cap.read_frame(frame_num)
+            if frame is not None:
+                decoded = time.perf_counter()
+                frame = self.frame_cache.prepare(frame)
+                self.frame_cache.put(self.video_path, frame_num, frame)
+                self.timings.record("decode", decoded - start)
+                self.timings.record("convert", time.perf_counter() - decoded)
+        if frame is not None:
+            self.display_frame(frame_num, frame)
+        if self.is_playing and self.decoder:
+            self.start_clock(frame_num)
+            self.decoder.seek(frame_num + self.decoder.step)
+        else:
+            # Warm the cache around the playhead for further scrubbing
+            self.prefetcher.prefetch(self.video_path, frame_num, self.total_frames)
+
+    def display_frame(self, frame_num, frame):
+        self.surface.set_frame(frame)
+        self.timings.mark_display()
+        self.show_position(frame_num)
+
+    def show_position(self, frame_num):
+        # Playhead, slider and time label; the picture is set by display_frame
         self.current_frame_num = frame_num
-        self.video_cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-        ret, frame = self.video_cap.read()
-        if ret:
-            # Convert to RGB for display
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            height, width, channel = frame.shape
-            bytes_per_line = 3 * width
-            q_img = QImage(frame.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_img)
-
-            self.scene.clear()
-            self.scene.addPixmap(pixmap)
-            self.time_slider.setValue(frame_num)  # Now frame_num is integer
-            current_time = frame_num / self.fps
-            duration = self.total_frames / self.fps
-            self.time_label.setText(f"{self.format_time(current_time)} / {self.format_time(duration)}")
-            self.frame_changed.emit(current_time)
+        self.time_slider.setValue(frame_num)  # Now frame_num is integer
+        current_time = self.frame_time(frame_num)
+        duration = self.total_frames / self.fps
+        self.time_label.setText(f"{self.format_time(current_time)} / {self.format_time(duration)}")
+        self.frame_changed.emit(current_time)
+
+    def on_frame_ready(self, frame_num, frame):
+        if not self.is_playing and frame_num == self.pending_frame:
+            self.pending_frame = None
+            self.display_frame(frame_num, frame)
+
+    def start_clock(self, frame_num):
+        self.clock_start = time.monotonic()
+        self.clock_frame = frame_num
+        self.clock_origin = self.frame_time(frame_num)
+
+    def clock_target_frame(self):
+        # Frame that should be on screen now according to the monotonic clock
+        elapsed = (time.monotonic() - self.clock_start) * self.play_speed
+        if not self.timeline_mode and self.video_cap and self.video_cap.index is not None:
+            return self.video_cap.index.frame_at_time(max(self.clock_origin + elapsed, 0))
+        return self.clock_frame + int(elapsed * self.fps)
 
     def update_frame(self):
-        if not self.video_cap or not self.video_loaded or not self.is_playing:
+        if not self.has_source() or not self.is_playing:
             return
 
-        next_frame = self.current_frame_num + 1
-        if next_frame >= self.total_frames:
-            self.is_playing = False
-            self.play_btn.setText("Play")
-            self.timer.stop()
+        last_frame = self.total_frames - 1
+        direction = 1 if self.play_speed > 0 else -1
+        if self.current_frame_num >= last_frame if direction > 0 else self.current_frame_num <= 0:
+            self.stop_playback()
+            return
+        if self.frames_shown == 0:
+            # Pre-roll: the clock starts with the first decoded frame, so start-up
+            # latency (opening, seeking, decoding a GOP) doesn't drop frames
+            entry = self.decoder.take_next()
+            if entry is not None:
+                self.frames_shown = 1
+                self.display_frame(*entry)
+                self.start_clock(entry[0])
+            elif self.decoder.at_end():
+                self.stop_playback()
+            return
+        target = min(max(self.clock_target_frame(), 0), last_frame)
+        if (target - self.current_frame_num) * direction <= 0:
             return
 
-        self.show_frame(next_frame)
+        # Only pull from the decoder buffer; never decode on the GUI thread.
+        # Frames the clock has already passed are skipped, not shown late.
+        entry = self.decoder.take_latest(target)
+        if entry is not None:
+            frame_num, frame = entry
+            distance = (frame_num - self.current_frame_num) * direction
+            if distance > 0:
+                self.dropped_frames += max(0, round(distance / self.decoder.spacing()) - 1)
+                self.frames_shown += 1
+                self.display_frame(frame_num, frame)
+        elif self.decoder.at_end():
+            # Container reported more frames than it actually holds
+            self.stop_playback()
 
-    def toggle_play(self):
-        if not self.video_cap or not self.video_loaded:
-            return
+    def stop_playback(self):
+        if self.is_playing:
+            self.toggle_play()
 
-        self.is_playing = not self.is_playing
+    def toggle_play(self):
         if self.is_playing:
+            self.stop_playback_clock()
+        else:
+            self.start_playback(1)
+
+    def start_playback(self, speed):
+        if not self.has_source():
+            return
+        if not self.decoder:
+            self.decoder = FrameDecoderThread(self.video_path, frame_cache=self.frame_cache,
+                                              keyframe_index=self.video_cap.index,
+                                              timings=self.timings)
+            self.decoder.reduced_decode = self.resolution_combo.currentText() != "Full"
+            self.decoder.start()
+        self.play_speed = speed
+        # Fast shuttle skips frames it won't display: every |speed|-th frame is
+        # grabbed forward, or only keyframes at the highest speeds and in reverse
+        step = int(speed)
+        keyframes_only = abs(step) >= KEYFRAME_SHUTTLE_SPEED or step < -1
+        self.decoder.set_stride(step, self.current_frame_num + step, keyframes_only=keyframes_only)
+        self.speed_label.setText("" if speed == 1 else f"{speed}x")
+        if not self.is_playing:
+            self.is_playing = True
             self.play_btn.setText("Pause")
-            # Calculate interval in milliseconds as integer
-            interval = max(1, int(1000 / self.fps))
+            self.frames_shown = 0
+            self.dropped_frames = 0
+            # Poll at twice the frame rate so frames land within half a frame of their time
+            interval = max(1, int(500 / self.fps))
             self.timer.start(interval)
+        self.start_clock(self.current_frame_num)
+
+    def stop_playback_clock(self):
+        self.is_playing = False
+        self.play_btn.setText("Play")
+        self.speed_label.setText("")
+        self.timer.stop()
+        self.playback_stopped.emit(self.frames_shown, self.dropped_frames)
+
+    def shuttle(self, direction):
+        # J (-1) / L (+1): start playing that way, or double the speed if
+        # already shuttling in that direction
+        speed = self.play_speed if self.is_playing else 0
+        if speed * direction > 0:
+            magnitude = SHUTTLE_SPEEDS[min(SHUTTLE_SPEEDS.index(abs(speed)) + 1, len(SHUTTLE_SPEEDS) - 1)]
         else:
-            self.play_btn.setText("Play")
-            self.timer.stop()
+            magnitude = SHUTTLE_SPEEDS[0]
+        self.start_playback(direction * magnitude)
+
+    def step_frame(self, direction):
+        if not self.has_source():
+            return
+        self.stop_playback()
+        frame_num = min(max(self.current_frame_num + direction, 0), self.total_frames - 1)
+        if self.timeline_mode or direction > 0:
+            self.show_frame(frame_num)
+            return
+        # Stepping back decodes the GOP once into the cache, on the prefetcher,
+        # rather than seeking back to its keyframe for every frame. The request
+        # also warms the GOP before this one, before it is reached.
+        self.prefetcher.prefetch(self.video_path, frame_num, self.total_frames, backward=True)
+        if self.frame_cache.contains(self.video_path, frame_num):
+            self.step_timer.stop()
+            self.show_frame(frame_num)
+            return
+        # Not decoded yet: the playhead moves now and the picture follows once
+        # the prefetcher has it, so holding the key never blocks on a GOP decode
+        self.show_position(frame_num)
+        self.step_deadline = time.monotonic() + STEP_PREFETCH_WAIT
+        self.step_tries = 1
+        self.step_timer.start()
+
+    def show_stepped_frame(self):
+        if self.is_playing or not self.has_source() or self.timeline_mode:
+            self.step_timer.stop()
+            return
+        frame_num = self.current_frame_num
+        if self.frame_cache.contains(self.video_path, frame_num):
+            self.step_timer.stop()
+            self.show_frame(frame_num)
+        elif time.monotonic() > self.step_deadline:
+            # The request may have been replaced by another one; ask again
+            if self.step_tries >= STEP_PREFETCH_TRIES:
+                self.step_timer.stop()
+                return
+            self.step_tries += 1
+            self.step_deadline = time.monotonic() + STEP_PREFETCH_WAIT
+            self.prefetcher.prefetch(self.video_path, frame_num, self.total_frames, backward=True)
 
     def seek_video(self, position):
         # Position is integer from slider
         self.show_frame(position)
 
+    def update_display_size(self, size):
+        # Frames are decoded/cached no larger than the surface (in device pixels)
+        ratio = self.surface.devicePixelRatioF()
+        self.display_size = (max(1, int(size.width() * ratio)), max(1, int(size.height() * ratio)))
+        self.apply_preview_resolution()
+
+    def preview_reduction(self):
+        # Preview downscale factor: 1, 2 or 4. Auto picks the largest one whose
+        # frames still cover the display.
+        text = self.resolution_combo.currentText()
+        if text in PREVIEW_SCALES:
+            return int(round(1 / PREVIEW_SCALES[text]))
+        if self.timeline_mode:
+            source_size = tuple(self.compositor.settings_provider()['resolution'])
+        elif self.video_cap and self.video_loaded:
+            source_size = (int(self.video_cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                           int(self.video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        else:
+            return 1
+        if self.display_size is None:
+            return 1
+        return 1 << reduction_level(source_size, self.display_size, 2)
+
+    def apply_preview_resolution(self):
+        # Clip frames are decoded and cached at the reduced size (never above the
+        # display size); the timeline compositor renders at the reduced scale
+        factor = self.preview_reduction()
+        max_size = self.display_size
+        if not self.timeline_mode and self.video_cap and self.video_loaded and factor > 1:
+            width = max(1, int(self.video_cap.get(cv2.CAP_PROP_FRAME_WIDTH)) // factor)
+            height = max(1, int(self.video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) // factor)
+            max_size = (width, height) if max_size is None else (min(width, max_size[0]), min(height, max_size[1]))
+        self.frame_cache.set_max_frame_size(max_size)
+        if isinstance(self.decoder, FrameDecoderThread):
+            self.decoder.reduced_decode = self.resolution_combo.currentText() != "Full"
+        if self.compositor and self.compositor.scale != 1 / factor:
+            self.compositor.set_scale(1 / factor)
+            self.resolution_changed.emit()
+            if self.timeline_mode:
+                self.decoder.invalidate()
+                if not self.is_playing:
+                    self.show_frame(self.current_frame_num)
+
+    def seek_time(self, seconds):
+        if not self.timeline_mode and self.video_cap and self.video_cap.index is not None:
+            self.show_frame(self.video_cap.index.frame_at_time(seconds))
+        else:
+            self.show_frame(int(round(seconds * self.fps)))
+
+    def set_compositor(self, compositor, render_cache=None):
+        self.compositor = compositor
+        self.compositor.timings = self.timings
+        self.render_cache = render_cache
+        self.apply_preview_resolution()
+        self.source_combo.setEnabled(True)
+
+    def set_timeline_mode(self, enabled):
+        if enabled == self.timeline_mode or (enabled and not self.compositor):
+            return
+        if self.is_playing:
+            self.toggle_play()
+        self.stop_decoder()
+        self.timeline_mode = enabled
+        if enabled:
+            self.decoder = PreviewRenderThread(self.compositor, timings=self.timings,
+                                               render_cache=self.render_cache)
+            self.decoder.frame_ready.connect(self.on_frame_ready)
+            self.decoder.start()
+            self.update_timeline_length()
+            self.apply_preview_resolution()
+            self.show_frame(0)
+        elif self.video_path:
+            self.load_video(self.video_path)
+            self.show_frame(0)
+
+    def update_timeline_length(self):
+        self.fps = self.compositor.fps()
+        self.total_frames = max(1, int(np.ceil(self.compositor.duration() * self.fps)))
+        self.time_slider.setRange(0, self.total_frames)
+
+    def timeline_changed(self):
+        # The clip model changed: drop stale rendered frames and re-render
+        if not self.timeline_mode:
+            return
+        self.update_timeline_length()
+        self.apply_preview_resolution()
+        self.decoder.invalidate()
+        if not self.is_playing:
+            self.show_frame(self.current_frame_num)
+
+    def set_preview_resolution(self, text):
+        self.apply_preview_resolution()
+        if not self.timeline_mode and self.video_loaded and not self.is_playing:
+            self.show_frame(self.current_frame_num)
+
+    def frame_time(self, frame_num):
+        if self.timeline_mode:
+            return frame_num / self.fps
+        # Exact presentation time when the media has been indexed (VFR safe)
+        if self.video_cap and self.video_cap.index is not None:
+            return self.video_cap.index.time_of(frame_num)
+        return frame_num / self.fps
+
+    def set_keyframe_index(self, path, index):
+        self.keyframe_indexes[path] = index
+        if path == self.video_path and self.video_cap:
+            self.video_cap.index = index
+            # Restart the clip decoder so it seeks through the index too; the
+            # timeline renderer keeps running while a clip is still loaded
+            if isinstance(self.decoder, FrameDecoderThread) and not self.is_playing:
+                self.stop_decoder()
+
+    def set_overlay_visible(self, visible):
+        if visible:
+            self.update_overlay()
+            self.overlay_timer.start(250)
+        else:
+            self.overlay_timer.stop()
+            self.surface.overlay = []
+            self.surface.update()
+
+    def timing_report(self):
+        # Context stored next to the histograms in a timing dump
+        return {
+            'source': "timeline" if self.timeline_mode else self.video_path,
+            'target_fps': self.fps,
+            'preview_scale': self.resolution_combo.currentText(),
+            'preview_reduction': self.preview_reduction(),
+            'display_size': list(self.frame_cache.max_frame_size or []),
+            'frames_shown': self.frames_shown,
+            'dropped_frames': self.dropped_frames,
+            'frame_cache': self.frame_cache.stats()
+        }
+
+    def update_overlay(self):
+        lines = []
+        for stage in FrameTimings.STAGES:
+            stats = self.timings.stage_stats(stage)
+            if stats:
+                lines.append(f"{stage:<8}{stats['mean_ms']:6.1f} ms  p95 {stats['p95_ms']:5.1f}")
+        lines.append(f"fps     {self.timings.achieved_fps():6.1f} / {self.fps:.2f}")
+        lines.append(f"dropped {self.dropped_frames:6d} of {self.frames_shown + self.dropped_frames}")
+        lines.append(f"cache   {self.frame_cache.hit_rate() * 100:6.1f}% hits")
+        self.surface.overlay = lines
+        self.surface.update()
+
+    def stop_decoder(self):
+        if self.decoder:
+            self.decoder.stop()
+            self.decoder = None
+
+    def shutdown(self):
+        self.stop_decoder()
+        self.prefetcher.stop()
+        if self.compositor:
+            self.compositor.close()
+
     def format_time(self, seconds):
         hours = int(seconds // 3600)
         minutes = int((seconds % 3600) // 60)
@@ -1309,11 +4722,18 @@ class VideoEditor(QMainWindow):
             "resolution": DEFAULT_RESOLUTION,
             "background": "#000000"
         }
-        self.clips = []  # List of clip dictionaries
+        self.clips = ClipStore()  # clip dicts by id, indexed per track by time
         self.next_clip_id = 1
         self.undo_stack = []
         self.redo_stack = []
         self.selected_clip_id = -1
+        self.dirty_ranges = []  # (start, end) spans touched by the edit in progress
+        
+        # Autosave a while after the last edit, so a burst of edits writes once
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(AUTOSAVE_DELAY_MS)
+        self.autosave_timer.timeout.connect(self.autosave)
         
         # Create central widget
         central_widget = QWidget()
@@ -1325,14 +4745,53 @@ class VideoEditor(QMainWindow):
         # Create splitter for main content
         main_splitter = QSplitter(Qt.Orientation.Vertical)
         
+        # Decoded frames shared by the player and media thumbnails
+        self.frame_cache = FrameCache()
+        
+        # Keyframe indexes built in the background for imported media
+        self.keyframe_indexes = {}
+        self.index_thread = KeyframeIndexThread()
+        self.index_thread.start()
+        
         # Video player
-        self.video_player = VideoPlayerWidget()
+        self.video_player = VideoPlayerWidget(frame_cache=self.frame_cache,
+                                              keyframe_indexes=self.keyframe_indexes)
+        self.index_thread.index_ready.connect(self.video_player.set_keyframe_index)
+        
+        # Proxy media for high-resolution sources (export always uses originals)
+        self.use_proxies = True
+        self.proxy_status = {}
+        self.media_items = {}
+        self.proxy_thread = ProxyThread()
+        self.proxy_thread.proxy_status.connect(self.update_proxy_status)
+        self.proxy_thread.start()
+        
+        # Composed timeline preview
+        self.compositor = TimelineCompositor(
+            lambda: self.clips, lambda: self.project_settings,
+            preview_path=self.preview_path, frame_cache=self.frame_cache,
+            keyframe_indexes=self.keyframe_indexes
+        )
+        self.render_cache = PreviewRenderCache(self.compositor)
+        self.render_thread = None
+        self.calibration_thread = None
+        self.video_player.set_compositor(self.compositor, self.render_cache)
         
         # Timeline
         self.timeline = TimelineWidget()
+        self.thumbnail_pool = ThumbnailPool(self.keyframe_indexes)
+        self.thumbnail_pool.start()
+        self.timeline.set_thumbnail_source(self.thumbnail_pool, self.find_clip)
+        self.timeline.sync(self.clips, self.get_clip_color)
+        self.waveform_thread = WaveformThread()
+        self.waveform_thread.peaks_ready.connect(self.timeline.set_waveform)
+        self.waveform_thread.start()
         self.timeline.clip_selected.connect(self.select_clip)
-        self.timeline.playhead_moved.connect(self.video_player.seek_video)
+        self.timeline.clips_edited.connect(self.apply_timeline_edits)
+        self.timeline.playhead_moved.connect(self.video_player.seek_time)
         self.video_player.frame_changed.connect(self.timeline.set_current_time)
+        self.video_player.playback_stopped.connect(self.show_playback_stats)
+        self.video_player.resolution_changed.connect(self.update_render_bar)
         
         main_splitter.addWidget(self.video_player)
         main_splitter.addWidget(self.timeline)
@@ -1412,6 +4871,18 @@ class VideoEditor(QMainWindow):
         split_action.triggered.connect(self.split_selected_clip)
         edit_menu.addAction(split_action)
         
+        marker_action = QAction("Add/Remove &Marker", self)
+        marker_action.setShortcut("M")
+        marker_action.triggered.connect(lambda: self.timeline.toggle_marker(self.timeline.current_time))
+        edit_menu.addAction(marker_action)
+        
+        snapping_action = QAction("S&napping", self)
+        snapping_action.setShortcut("S")
+        snapping_action.setCheckable(True)
+        snapping_action.setChecked(True)
+        snapping_action.toggled.connect(self.timeline.set_snapping)
+        edit_menu.addAction(snapping_action)
+        
         edit_menu.addSeparator()
         
         cut_action = QAction("Cu&t", self)
@@ -1439,6 +4910,68 @@ class VideoEditor(QMainWindow):
         fullscreen_action.triggered.connect(self.toggle_fullscreen)
         view_menu.addAction(fullscreen_action)
         
+        view_menu.addSeparator()
+        shuttle_reverse_action = QAction("Shuttle &Reverse", self)
+        shuttle_reverse_action.setShortcut("J")
+        shuttle_reverse_action.triggered.connect(lambda: self.video_player.shuttle(-1))
+        view_menu.addAction(shuttle_reverse_action)
+        
+        shuttle_stop_action = QAction("Shuttle &Stop", self)
+        shuttle_stop_action.setShortcut("K")
+        shuttle_stop_action.triggered.connect(self.video_player.stop_playback)
+        view_menu.addAction(shuttle_stop_action)
+        
+        shuttle_forward_action = QAction("Shuttle &Forward", self)
+        shuttle_forward_action.setShortcut("L")
+        shuttle_forward_action.triggered.connect(lambda: self.video_player.shuttle(1))
+        view_menu.addAction(shuttle_forward_action)
+        
+        previous_frame_action = QAction("Pre&vious Frame", self)
+        previous_frame_action.setShortcut("Left")
+        previous_frame_action.triggered.connect(lambda: self.video_player.step_frame(-1))
+        view_menu.addAction(previous_frame_action)
+        
+        next_frame_action = QAction("&Next Frame", self)
+        next_frame_action.setShortcut("Right")
+        next_frame_action.triggered.connect(lambda: self.video_player.step_frame(1))
+        view_menu.addAction(next_frame_action)
+        view_menu.addSeparator()
+        
+        zoom_in_action = QAction("Zoom &In", self)
+        zoom_in_action.setShortcut(QKeySequence.StandardKey.ZoomIn)
+        zoom_in_action.triggered.connect(self.timeline.zoom_in)
+        view_menu.addAction(zoom_in_action)
+        
+        zoom_out_action = QAction("Zoom O&ut", self)
+        zoom_out_action.setShortcut(QKeySequence.StandardKey.ZoomOut)
+        zoom_out_action.triggered.connect(self.timeline.zoom_out)
+        view_menu.addAction(zoom_out_action)
+        
+        zoom_fit_action = QAction("&Zoom to Fit", self)
+        zoom_fit_action.setShortcut("Ctrl+0")
+        zoom_fit_action.triggered.connect(self.timeline.zoom_to_fit)
+        view_menu.addAction(zoom_fit_action)
+        view_menu.addSeparator()
+        
+        proxy_action = QAction("Use &Proxy Media", self)
+        proxy_action.setCheckable(True)
+        proxy_action.setChecked(True)
+        proxy_action.toggled.connect(self.set_use_proxies)
+        view_menu.addAction(proxy_action)
+        
+        cache_stats_action = QAction("Frame &Cache Statistics", self)
+        cache_stats_action.triggered.connect(self.show_frame_cache_stats)
+        view_menu.addAction(cache_stats_action)
+        
+        overlay_action = QAction("Performance &Overlay", self)
+        overlay_action.setCheckable(True)
+        overlay_action.toggled.connect(self.video_player.set_overlay_visible)
+        view_menu.addAction(overlay_action)
+        
+        timings_action = QAction("Save Frame &Timings...", self)
+        timings_action.triggered.connect(self.save_frame_timings)
+        view_menu.addAction(timings_action)
+        
         # Project menu
         project_menu = menubar.addMenu("&Project")
         
@@ -1446,6 +4979,15 @@ class VideoEditor(QMainWindow):
         settings_action.triggered.connect(self.show_project_settings)
         project_menu.addAction(settings_action)
         
+        render_action = QAction("&Render Preview", self)
+        render_action.setShortcut("Ctrl+Shift+R")
+        render_action.triggered.connect(self.render_preview)
+        project_menu.addAction(render_action)
+        
+        calibrate_action = QAction("&Calibrate Export Estimate", self)
+        calibrate_action.triggered.connect(self.calibrate_export_estimate)
+        project_menu.addAction(calibrate_action)
+        
         # Effects menu
         effects_menu = menubar.addMenu("&Effects")
         
@@ -1771,11 +5313,16 @@ class VideoEditor(QMainWindow):
         if self.check_unsaved_changes():
             self.project_name = DEFAULT_PROJECT_NAME
             self.project_path = None
-            self.clips = []
+            self.clips = ClipStore()
             self.next_clip_id = 1
-            self.timeline.draw_timeline()
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+            self.timeline.set_markers([])
+            self.rebuild_timeline()
             self.media_list.clear()
+            self.media_items = {}
             self.setWindowTitle(f"{self.project_name} - PyCut Pro")
+            self.timeline_changed()
             self.statusBar().showMessage("New project created")
     
     def open_project(self):
@@ -1795,22 +5342,18 @@ class VideoEditor(QMainWindow):
                         "resolution": DEFAULT_RESOLUTION,
                         "background": "#000000"
                     })
-                    self.clips = data.get('clips', [])
+                    self.clips = ClipStore(data.get('clips', []))
                     self.next_clip_id = data.get('next_clip_id', 1)
+                    self.undo_stack.clear()
+                    self.redo_stack.clear()
                     
                     # Rebuild timeline
-                    self.timeline.draw_timeline()
-                    for clip in self.clips:
-                        color = self.get_clip_color(clip['type'])
-                        timeline_clip = self.timeline.add_clip(
-                            clip['id'], clip['start'], clip['duration'], 
-                            clip['track'], clip.get('name', 'Clip'), 
-                            clip['type'], color
-                        )
-                        timeline_clip.clip_id = clip['id']
+                    self.timeline.set_markers(data.get('markers', []))
+                    self.rebuild_timeline()
                     
                     # Rebuild media library
                     self.media_list.clear()
+                    self.media_items = {}
                     media_paths = set()
                     for clip in self.clips:
                         if clip['type'] in ['video', 'image', 'audio', 'sticker']:
@@ -1819,7 +5362,17 @@ class VideoEditor(QMainWindow):
                     for path in media_paths:
                         self.add_media_to_library(path)
                     
+                    # Cached indexes and proxies load instantly from the cache
+                    for clip in self.clips:
+                        if clip['type'] == 'video':
+                            self.index_thread.enqueue(clip['path'])
+                            if clip.get('height', 0) > PROXY_MIN_SOURCE_HEIGHT:
+                                self.proxy_thread.enqueue(clip['path'])
+                        elif clip['type'] == 'audio':
+                            self.waveform_thread.enqueue(clip['path'])
+                    
                     self.setWindowTitle(f"{self.project_name} - PyCut Pro")
+                    self.timeline_changed()
                     self.statusBar().showMessage(f"Project loaded: {os.path.basename(file_path)}")
                     
                 except Exception as e:
@@ -1842,17 +5395,19 @@ class VideoEditor(QMainWindow):
             self.project_name = os.path.basename(file_path).replace('.pcp', '')
             self.do_save_project(file_path)
     
+    def project_data(self):
+        return {
+            'name': self.project_name,
+            'settings': self.project_settings,
+            'clips': list(self.clips),
+            'markers': self.timeline.markers,
+            'next_clip_id': self.next_clip_id
+        }
+    
     def do_save_project(self, file_path):
         try:
-            data = {
-                'name': self.project_name,
-                'settings': self.project_settings,
-                'clips': self.clips,
-                'next_clip_id': self.next_clip_id
-            }
-            
             with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+                json.dump(self.project_data(), f, indent=2)
             
             self.setWindowTitle(f"{self.project_name} - PyCut Pro")
             self.statusBar().showMessage(f"Project saved: {os.path.basename(file_path)}")
@@ -1874,10 +5429,45 @@ class VideoEditor(QMainWindow):
             self, "Export Video", self.project_name, "MP4 Files (*.mp4)"
         )
         if file_path:
+            # Pre-flight estimate
+            estimator = ExportEstimator()
+            estimate = estimator.estimate(self.clips, self.project_settings)
+            message = estimator.summary(estimate)
+            try:
+                free_bytes = shutil.disk_usage(tempfile.gettempdir()).free
+                message += f"\nFree scratch space: {format_bytes(free_bytes)}"
+                if free_bytes < estimate['scratch_bytes']:
+                    message += "\n\nWarning: not enough free space in the temp directory!"
+            except OSError:
+                pass
+            reply = QMessageBox.question(self, "Export", message + "\n\nStart export?")
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+                
             dialog = ExportProgressDialog(self)
             dialog.start_export(self.clips, self.project_settings, file_path)
             dialog.exec()
     
+    def calibrate_export_estimate(self):
+        if self.calibration_thread:
+            self.statusBar().showMessage("Export calibration is already running")
+            return
+        self.statusBar().showMessage("Running export calibration benchmark...")
+        self.calibration_thread = CalibrationThread()
+        self.calibration_thread.calibrated.connect(self.calibration_complete)
+        self.calibration_thread.failed.connect(self.calibration_failed)
+        self.calibration_thread.finished.connect(self.calibration_finished)
+        self.calibration_thread.start()
+    
+    def calibration_complete(self, rate):
+        self.statusBar().showMessage(f"Calibration complete: {rate * 1000:.2f} ms per megapixel")
+    
+    def calibration_failed(self, message):
+        QMessageBox.critical(self, "Error", f"Calibration failed:\n{message}")
+    
+    def calibration_finished(self):
+        self.calibration_thread = None
+    
     def import_media(self, track=0):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Import Media", "", 
@@ -1932,14 +5522,13 @@ class VideoEditor(QMainWindow):
                 'anim_duration': values['anim_duration']
             }
             
-            self.clips.append(clip_data)
-            timeline_clip = self.timeline.add_clip(
-                clip_id, clip_data['start'], clip_data['duration'], 
-                track, clip_data['name'], 'text', Qt.GlobalColor.green
-            )
-            timeline_clip.clip_id = clip_id
+            self.push_undo()
+            self.clips.add(clip_data)
+            self.mark_dirty(clip_data)
+            self.timeline.clip_added(clip_data)
             
             self.add_media_to_library("Text: " + values['text'][:20], is_text=True)
+            self.timeline_changed()
     
     def add_sticker(self, track=0):
         dialog = StickerDialog(self)
@@ -1964,14 +5553,13 @@ class VideoEditor(QMainWindow):
                 'opacity': values['opacity']
             }
             
-            self.clips.append(clip_data)
-            timeline_clip = self.timeline.add_clip(
-                clip_id, clip_data['start'], clip_data['duration'], 
-                track, clip_data['name'], 'sticker', Qt.GlobalColor.yellow
-            )
-            timeline_clip.clip_id = clip_id
+            self.push_undo()
+            self.clips.add(clip_data)
+            self.mark_dirty(clip_data)
+            self.timeline.clip_added(clip_data)
             
             self.add_media_to_library(values['path'])
+            self.timeline_changed()
             self.statusBar().showMessage(f"Sticker added: {sticker_name}")
     
     def add_transition(self, track=0):
@@ -1987,12 +5575,11 @@ class VideoEditor(QMainWindow):
             'name': "Fade Transition"
         }
         
-        self.clips.append(clip_data)
-        timeline_clip = self.timeline.add_clip(
-            clip_id, clip_data['start'], clip_data['duration'], 
-            track, clip_data['name'], 'transition', Qt.GlobalColor.cyan
-        )
-        timeline_clip.clip_id = clip_id
+        self.push_undo()
+        self.clips.add(clip_data)
+        self.mark_dirty(clip_data)
+        self.timeline.clip_added(clip_data)
+        self.timeline_changed()
         self.statusBar().showMessage("Fade transition added")
     
     def add_video_clip(self, file_path, track=0):
@@ -2004,12 +5591,18 @@ class VideoEditor(QMainWindow):
                 
             fps = cap.get(cv2.CAP_PROP_FPS)
             frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             duration = frame_count / fps if fps > 0 else 0
             cap.release()
             
             clip_id = self.next_clip_id
             self.next_clip_id += 1
             
+            self.index_thread.enqueue(file_path)
+            if height > PROXY_MIN_SOURCE_HEIGHT:
+                self.proxy_thread.enqueue(file_path)
+            
             clip_name = os.path.basename(file_path)
             clip_data = {
                 'id': clip_id,
@@ -2019,21 +5612,23 @@ class VideoEditor(QMainWindow):
                 'duration': duration,
                 'name': clip_name,
                 'path': file_path,
-                'start_trim': 0
+                'start_trim': 0,
+                'width': width,
+                'height': height,
+                'fps': fps if fps > 0 else DEFAULT_FPS
             }
             
-            self.clips.append(clip_data)
-            timeline_clip = self.timeline.add_clip(
-                clip_id, clip_data['start'], clip_data['duration'], 
-                track, clip_name, 'video', Qt.GlobalColor.blue
-            )
-            timeline_clip.clip_id = clip_id
+            self.push_undo()
+            self.clips.add(clip_data)
+            self.mark_dirty(clip_data)
+            self.timeline.clip_added(clip_data)
             
             self.add_media_to_library(file_path)
+            self.timeline_changed()
             self.statusBar().showMessage(f"Loaded: {clip_name}")
             
             # Load the video in the player
-            if not self.video_player.load_video(file_path):
+            if not self.video_player.load_video(self.preview_path(file_path)):
                 self.statusBar().showMessage(f"Failed to load video: {clip_name}")
                 
         except Exception as e:
@@ -2065,14 +5660,14 @@ class VideoEditor(QMainWindow):
                 'volume': 1.0
             }
             
-            self.clips.append(clip_data)
-            timeline_clip = self.timeline.add_clip(
-                clip_id, clip_data['start'], clip_data['duration'], 
-                track, clip_name, 'audio', Qt.GlobalColor.magenta
-            )
-            timeline_clip.clip_id = clip_id
+            self.push_undo()
+            self.clips.add(clip_data)
+            self.mark_dirty(clip_data)
+            self.waveform_thread.enqueue(file_path)
+            self.timeline.clip_added(clip_data)
             
             self.add_media_to_library(file_path)
+            self.timeline_changed()
             self.statusBar().showMessage(f"Loaded: {clip_name}")
                 
         except Exception as e:
@@ -2093,14 +5688,13 @@ class VideoEditor(QMainWindow):
             'path': file_path
         }
         
-        self.clips.append(clip_data)
-        timeline_clip = self.timeline.add_clip(
-            clip_id, clip_data['start'], clip_data['duration'], 
-            track, clip_name, 'image', Qt.GlobalColor.cyan
-        )
-        timeline_clip.clip_id = clip_id
+        self.push_undo()
+        self.clips.add(clip_data)
+        self.mark_dirty(clip_data)
+        self.timeline.clip_added(clip_data)
         
         self.add_media_to_library(file_path)
+        self.timeline_changed()
         self.statusBar().showMessage(f"Loaded: {clip_name}")
     
     def add_media_to_library(self, path, is_text=False):
@@ -2113,18 +5707,23 @@ class VideoEditor(QMainWindow):
             ext = os.path.splitext(path)[1].lower()[1:]
             if ext in SUPPORTED_VIDEO_FORMATS:
                 # Try to get thumbnail
-                cap = cv2.VideoCapture(path)
-                if cap.isOpened():
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    ret, frame = cap.read()
-                    if ret:
-                        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        height, width, _ = frame.shape
-                        bytes_per_line = 3 * width
-                        q_img = QImage(frame.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-                        pixmap = QPixmap.fromImage(q_img).scaled(64, 36, Qt.AspectRatioMode.KeepAspectRatio)
-                        item.setIcon(QIcon(pixmap))
+                frame = self.frame_cache.get(path, 0)
+                if frame is None:
+                    cap = cv2.VideoCapture(path)
+                    if cap.isOpened():
+                        ret, frame = cap.read()
+                        if ret:
+                            frame = self.frame_cache.prepare(frame)
+                            self.frame_cache.put(path, 0, frame)
+                        else:
+                            frame = None
                     cap.release()
+                if frame is not None:
+                    height, width, _ = frame.shape
+                    bytes_per_line = 3 * width
+                    q_img = QImage(frame.data, width, height, bytes_per_line, QImage.Format.Format_BGR888)
+                    pixmap = QPixmap.fromImage(q_img).scaled(64, 36, Qt.AspectRatioMode.KeepAspectRatio)
+                    item.setIcon(QIcon(pixmap))
                 item.setText(os.path.basename(path))
             elif ext in SUPPORTED_AUDIO_FORMATS:
                 item.setText(os.path.basename(path))
@@ -2135,39 +5734,90 @@ class VideoEditor(QMainWindow):
                 item.setText(os.path.basename(path))
         
         self.media_list.addItem(item)
+        if not is_text:
+            self.media_items[path] = item
+            self.update_media_item_label(path)
+    
+    def update_media_item_label(self, path):
+        item = self.media_items.get(path)
+        if item is None:
+            return
+        status = self.proxy_status.get(path)
+        name = os.path.basename(path)
+        if status == "ready":
+            item.setText(f"{name} [Proxy]")
+        elif status in ("queued", "building"):
+            item.setText(f"{name} [Proxy: {status}...]")
+        elif status == "failed":
+            item.setText(f"{name} [Proxy failed]")
+        else:
+            item.setText(name)
+        item.setToolTip(path if status is None else f"{path}\nProxy: {status}")
+    
+    def preview_path(self, path):
+        # Media file the player and timeline decode for preview
+        if self.use_proxies and self.proxy_status.get(path) == "ready":
+            return proxy_path_for(path)
+        return path
+    
+    def update_proxy_status(self, path, status):
+        self.proxy_status[path] = status
+        self.update_media_item_label(path)
+        if status == "ready" and self.use_proxies and self.video_player.video_path == path:
+            self.switch_player_source(path)
+            self.statusBar().showMessage(f"Proxy ready: {os.path.basename(path)}")
+    
+    def set_use_proxies(self, enabled):
+        self.use_proxies = enabled
+        current = self.video_player.video_path
+        for path in self.proxy_status:
+            if current in (path, proxy_path_for(path)):
+                self.switch_player_source(path)
+                break
+    
+    def switch_player_source(self, original_path):
+        # Reload the player from the proxy or the original at the same frame
+        if self.video_player.timeline_mode:
+            # Don't leave timeline preview; the clip source loads on switching back
+            self.video_player.video_path = self.preview_path(original_path)
+            return
+        frame_num = self.video_player.current_frame_num
+        if self.video_player.load_video(self.preview_path(original_path)):
+            self.video_player.show_frame(frame_num)
     
     def select_clip(self, clip_id):
         self.selected_clip_id = clip_id
-        for clip in self.clips:
-            if clip['id'] == clip_id:
-                # Update effects panel with clip properties
-                self.fade_in.setValue(clip.get('fade_in', 0))
-                self.fade_out.setValue(clip.get('fade_out', 0))
-                self.scale.setValue(clip.get('scale', 1))
-                self.rotation.setValue(clip.get('rotation', 0))
-                self.opacity.setValue(clip.get('opacity', 1))
-                self.bw.setChecked(clip.get('bw', False))
-                self.blur.setValue(clip.get('blur', 0))
-                self.chroma_key.setChecked(clip.get('chroma_key', False))
-                break
+        clip = self.clips.get(clip_id)
+        if clip:
+            # Update effects panel with clip properties
+            self.fade_in.setValue(clip.get('fade_in', 0))
+            self.fade_out.setValue(clip.get('fade_out', 0))
+            self.scale.setValue(clip.get('scale', 1))
+            self.rotation.setValue(clip.get('rotation', 0))
+            self.opacity.setValue(clip.get('opacity', 1))
+            self.bw.setChecked(clip.get('bw', False))
+            self.blur.setValue(clip.get('blur', 0))
+            self.chroma_key.setChecked(clip.get('chroma_key', False))
     
     def apply_effects_to_selected(self):
         if self.selected_clip_id == -1:
             self.statusBar().showMessage("No clip selected")
             return
             
-        for clip in self.clips:
-            if clip['id'] == self.selected_clip_id:
-                clip['fade_in'] = self.fade_in.value()
-                clip['fade_out'] = self.fade_out.value()
-                clip['scale'] = self.scale.value()
-                clip['rotation'] = self.rotation.value()
-                clip['opacity'] = self.opacity.value()
-                clip['bw'] = self.bw.isChecked()
-                clip['blur'] = self.blur.value()
-                clip['chroma_key'] = self.chroma_key.isChecked()
-                self.statusBar().showMessage("Effects applied to selected clip")
-                break
+        clip = self.clips.get(self.selected_clip_id)
+        if clip:
+            self.push_undo()
+            self.mark_dirty(clip)
+            clip['fade_in'] = self.fade_in.value()
+            clip['fade_out'] = self.fade_out.value()
+            clip['scale'] = self.scale.value()
+            clip['rotation'] = self.rotation.value()
+            clip['opacity'] = self.opacity.value()
+            clip['bw'] = self.bw.isChecked()
+            clip['blur'] = self.blur.value()
+            clip['chroma_key'] = self.chroma_key.isChecked()
+            self.timeline_changed()
+            self.statusBar().showMessage("Effects applied to selected clip")
     
     def apply_chroma_key(self):
         if self.selected_clip_id == -1:
@@ -2177,14 +5827,16 @@ class VideoEditor(QMainWindow):
         dialog = ChromaKeyDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             values = dialog.get_values()
-            for clip in self.clips:
-                if clip['id'] == self.selected_clip_id:
-                    clip['chroma_key'] = True
-                    clip['chroma_color'] = values['chroma_color']
-                    clip['chroma_similarity'] = values['chroma_similarity']
-                    clip['chroma_blend'] = values['chroma_blend']
-                    self.statusBar().showMessage("Chroma key effect applied")
-                    break
+            clip = self.clips.get(self.selected_clip_id)
+            if clip:
+                self.push_undo()
+                self.mark_dirty(clip)
+                clip['chroma_key'] = True
+                clip['chroma_color'] = values['chroma_color']
+                clip['chroma_similarity'] = values['chroma_similarity']
+                clip['chroma_blend'] = values['chroma_blend']
+                self.timeline_changed()
+                self.statusBar().showMessage("Chroma key effect applied")
     
     def apply_lut(self):
         if self.selected_clip_id == -1:
@@ -2195,11 +5847,13 @@ class VideoEditor(QMainWindow):
             self, "Select LUT File", "", "LUT Files (*.cube *.3dl)"
         )
         if file_path:
-            for clip in self.clips:
-                if clip['id'] == self.selected_clip_id:
-                    clip['lut'] = file_path
-                    self.statusBar().showMessage(f"LUT applied: {os.path.basename(file_path)}")
-                    break
+            clip = self.clips.get(self.selected_clip_id)
+            if clip:
+                self.push_undo()
+                self.mark_dirty(clip)
+                clip['lut'] = file_path
+                self.timeline_changed()
+                self.statusBar().showMessage(f"LUT applied: {os.path.basename(file_path)}")
     
     def adjust_speed(self):
         if self.selected_clip_id == -1:
@@ -2209,79 +5863,107 @@ class VideoEditor(QMainWindow):
         dialog = SpeedDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             values = dialog.get_values()
-            for clip in self.clips:
-                if clip['id'] == self.selected_clip_id:
-                    clip['speed'] = values['speed']
-                    self.statusBar().showMessage(f"Speed adjusted to {values['speed']}x")
-                    break
+            clip = self.clips.get(self.selected_clip_id)
+            if clip:
+                self.push_undo()
+                self.mark_dirty(clip)
+                clip['speed'] = values['speed']
+                self.timeline_changed()
+                self.statusBar().showMessage(f"Speed adjusted to {values['speed']}x")
     
     def delete_selected(self):
         if self.selected_clip_id == -1:
             self.statusBar().showMessage("No clip selected")
             return
                 
-        # Remove from timeline
-        self.timeline.remove_clip(self.selected_clip_id)
-                
-        # Remove from clips list
-        for i, clip in enumerate(self.clips):
-            if clip['id'] == self.selected_clip_id:
-                del self.clips[i]
-                self.selected_clip_id = -1
-                self.statusBar().showMessage("Clip deleted")
-                break
+        clip = self.clips.get(self.selected_clip_id)
+        if clip:
+            self.push_undo()
+            self.mark_dirty(clip)
+            self.clips.remove(self.selected_clip_id)
+            self.timeline.remove_clip(self.selected_clip_id)
+            self.selected_clip_id = -1
+            self.timeline_changed()
+            self.statusBar().showMessage("Clip deleted")
     
     def split_selected_clip(self):
         if self.selected_clip_id == -1:
             self.statusBar().showMessage("Select a clip first")
             return
             
-        for clip in self.clips:
-            if clip['id'] == self.selected_clip_id:
-                if clip['type'] not in ['video', 'audio']:
-                    self.statusBar().showMessage("Only video and audio clips can be split")
-                    return
-                    
-                current_time = self.timeline.current_time
-                clip_time = current_time - clip['start']
-                
-                if clip_time <= 0 or clip_time >= clip['duration']:
-                    self.statusBar().showMessage("Playhead must be within the clip")
-                    return
-                    
-                # Create new clip for the second part
-                new_clip_id = self.next_clip_id
-                self.next_clip_id += 1
-                
-                new_clip = clip.copy()
-                new_clip['id'] = new_clip_id
-                new_clip['start'] = current_time
-                new_clip['duration'] = clip['duration'] - clip_time
-                new_clip['start_trim'] = clip.get('start_trim', 0) + clip_time
-                
-                # Update original clip
-                clip['duration'] = clip_time
-                
-                # Update timeline
-                timeline_clip = self.timeline.get_clip(clip['id'])
-                if timeline_clip:
-                    timeline_clip.duration = clip_time
-                    timeline_clip.update_label()
-                    
-                # Add new clip to timeline
-                color = self.get_clip_color(new_clip['type'])
-                new_timeline_clip = self.timeline.add_clip(
-                    new_clip_id, new_clip['start'], new_clip['duration'], 
-                    new_clip['track'], new_clip['name'], new_clip['type'], color
-                )
-                new_timeline_clip.clip_id = new_clip_id
-                
-                # Add to clips list
-                self.clips.append(new_clip)
-                
-                self.statusBar().showMessage("Clip split at playhead position")
-                break
+        clip = self.clips.get(self.selected_clip_id)
+        if not clip:
+            return
+        if clip['type'] not in ['video', 'audio']:
+            self.statusBar().showMessage("Only video and audio clips can be split")
+            return
+            
+        current_time = self.timeline.current_time
+        clip_time = current_time - clip['start']
+        
+        if clip_time <= 0 or clip_time >= clip['duration']:
+            self.statusBar().showMessage("Playhead must be within the clip")
+            return
+            
+        self.push_undo()
+        self.mark_dirty(clip)
+        
+        # Create new clip for the second part
+        new_clip_id = self.next_clip_id
+        self.next_clip_id += 1
+        
+        new_clip = clip.copy()
+        new_clip['id'] = new_clip_id
+        new_clip['start'] = current_time
+        new_clip['duration'] = clip['duration'] - clip_time
+        new_clip['start_trim'] = clip.get('start_trim', 0) + clip_time
+        
+        # Update original clip
+        clip['duration'] = clip_time
+        self.clips.update(clip)
+        self.timeline.clip_changed(clip)
+        
+        # Add the second part
+        self.clips.add(new_clip)
+        self.timeline.clip_added(new_clip)
+        
+        self.timeline_changed()
+        self.statusBar().showMessage("Clip split at playhead position")
     
+    def push_undo(self):
+        # Snapshot before an edit; clips are copied one level deep since edits
+        # replace clip values rather than mutate them
+        self.undo_stack.append({
+            'clips': ClipStore(dict(clip) for clip in self.clips),
+            'next_clip_id': self.next_clip_id
+        })
+        del self.undo_stack[:-UNDO_LIMIT]
+        self.redo_stack.clear()
+        
+    def mark_dirty(self, clip):
+        # Timeline span whose preview the current edit invalidates
+        self.dirty_ranges.append((clip['start'], clip['start'] + clip['duration']))
+        
+    def apply_timeline_edits(self, changes):
+        # A drag or resize on the timeline: one undo step and one render cache
+        # update for the whole gesture, however many clips it moved
+        self.push_undo()
+        for clip_id, start, duration in changes:
+            clip = self.clips.get(clip_id)
+            if clip is None:
+                continue
+            self.mark_dirty(clip)
+            if clip['type'] in ('video', 'audio') and abs(start - clip['start']) > 1e-9 and \
+                    abs(duration - clip['duration']) > 1e-9:
+                # Trimmed at the left edge: the source in-point moves with the start
+                clip['start_trim'] = max(clip.get('start_trim', 0) + (start - clip['start']) * clip.get('speed', 1), 0)
+            clip['start'] = start
+            clip['duration'] = duration
+            self.clips.update(clip)
+            self.mark_dirty(clip)
+            self.timeline.clip_changed(clip)
+        self.timeline_changed()
+        
     def undo(self):
         if self.undo_stack:
             state = self.undo_stack.pop()
@@ -2292,6 +5974,7 @@ class VideoEditor(QMainWindow):
             self.clips = state['clips']
             self.next_clip_id = state['next_clip_id']
             self.rebuild_timeline()
+            self.timeline_changed()
             self.statusBar().showMessage("Undo")
     
     def redo(self):
@@ -2304,18 +5987,76 @@ class VideoEditor(QMainWindow):
             self.clips = state['clips']
             self.next_clip_id = state['next_clip_id']
             self.rebuild_timeline()
+            self.timeline_changed()
             self.statusBar().showMessage("Redo")
     
+    def find_clip(self, clip_id):
+        return self.clips.get(clip_id)
+    
+    def timeline_changed(self):
+        # Called after every edit of the clip model. Edits that marked their
+        # dirty ranges only re-check the render cache there.
+        ranges, self.dirty_ranges = self.dirty_ranges, []
+        self.timeline.frame_rate = self.project_settings.get('fps', DEFAULT_FPS)
+        self.update_render_bar(ranges or None)
+        self.video_player.timeline_changed()
+        self.autosave_timer.start()
+    
+    def update_render_bar(self, ranges=None):
+        self.render_cache.refresh(ranges)
+        self.timeline.set_render_ranges(self.render_cache.ranges())
+        
+    def autosave_path(self):
+        name = os.path.splitext(os.path.basename(self.project_path))[0] if self.project_path else self.project_name
+        digest = hashlib.sha1(os.path.abspath(self.project_path or name).encode('utf-8')).hexdigest()[:8]
+        return os.path.join(AUTOSAVE_DIR, f"{name}-{digest}.pcp")
+        
+    def autosave(self):
+        # Crash-recovery copy in AUTOSAVE_DIR; the project file is only written by Save
+        path = self.autosave_path()
+        try:
+            os.makedirs(AUTOSAVE_DIR, exist_ok=True)
+            with open(path + ".part", 'w') as f:
+                json.dump(self.project_data(), f)
+            os.replace(path + ".part", path)
+            self.statusBar().showMessage(f"Autosaved to {path}", 3000)
+        except OSError as e:
+            self.statusBar().showMessage(f"Autosave failed: {e}")
+    
+    def render_preview(self):
+        # Selected clip's range, or the whole timeline
+        clip = self.find_clip(self.selected_clip_id)
+        if clip:
+            start, end = clip['start'], clip['start'] + clip['duration']
+        else:
+            start, end = 0, self.compositor.duration()
+        if end <= start:
+            self.statusBar().showMessage("Nothing to render")
+            return
+        if self.render_thread:
+            self.render_thread.stop()
+        self.render_thread = RenderPreviewThread(
+            self.clips, self.project_settings, self.compositor.scale, start, end,
+            preview_path=self.preview_path, keyframe_indexes=self.keyframe_indexes
+        )
+        self.render_thread.chunk_rendered.connect(self.preview_chunk_rendered)
+        self.render_thread.finished.connect(self.preview_render_finished)
+        self.render_thread.start()
+        self.statusBar().showMessage(f"Rendering preview {format_duration(start)} - {format_duration(end)}...")
+    
+    def preview_chunk_rendered(self, done, total):
+        self.update_render_bar()
+        self.statusBar().showMessage(f"Rendering preview: {done}/{total} segments")
+    
+    def preview_render_finished(self):
+        if self.sender() is self.render_thread:
+            error_message = self.render_thread.error_message
+            self.render_thread = None
+            self.update_render_bar()
+            self.statusBar().showMessage(error_message or "Preview rendered")
+    
     def rebuild_timeline(self):
-        self.timeline.draw_timeline()
-        for clip in self.clips:
-            color = self.get_clip_color(clip['type'])
-            timeline_clip = self.timeline.add_clip(
-                clip['id'], clip['start'], clip['duration'], 
-                clip['track'], clip.get('name', 'Clip'), 
-                clip['type'], color
-            )
-            timeline_clip.clip_id = clip['id']
+        self.timeline.sync(self.clips, self.get_clip_color)
     
     def get_clip_color(self, clip_type):
         colors = {
@@ -2399,8 +6140,45 @@ class VideoEditor(QMainWindow):
             'background': background
         }
         self.setWindowTitle(f"{self.project_name} - PyCut Pro")
+        self.timeline_changed()
         dialog.accept()
     
+    def closeEvent(self, event):
+        self.video_player.shutdown()
+        self.index_thread.stop()
+        self.proxy_thread.stop()
+        self.thumbnail_pool.stop()
+        self.waveform_thread.stop()
+        if self.render_thread:
+            self.render_thread.stop()
+        if self.calibration_thread:
+            self.calibration_thread.wait()
+        super().closeEvent(event)
+    
+    def show_frame_cache_stats(self):
+        stats = self.frame_cache.stats()
+        QMessageBox.information(self, "Frame Cache",
+                               f"Cached frames: {stats['frames']}\n"
+                               f"Memory: {format_bytes(stats['used_bytes'])} / {format_bytes(stats['max_bytes'])}\n"
+                               f"Hits: {stats['hits']}  Misses: {stats['misses']}\n"
+                               f"Hit rate: {stats['hit_rate'] * 100:.1f}%")
+    
+    def save_frame_timings(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Frame Timings", "pycut-timings.json", "JSON Files (*.json)"
+        )
+        if file_path:
+            try:
+                self.video_player.timings.dump(file_path, self.video_player.timing_report())
+                self.statusBar().showMessage(f"Frame timings saved: {os.path.basename(file_path)}")
+            except OSError as e:
+                self.statusBar().showMessage(f"Error saving frame timings: {str(e)}")
+    
+    def show_playback_stats(self, shown, dropped):
+        if shown + dropped:
+            self.statusBar().showMessage(f"Playback: {shown} frames shown, {dropped} dropped "
+                                         f"({dropped * 100 / (shown + dropped):.1f}%)")
+
     def toggle_fullscreen(self):
         if self.isFullScreen():
             self.showNormal()
@@ -2414,7 +6192,232 @@ class VideoEditor(QMainWindow):
                          "© 2023 PyCut Software\n\n"
                          "A powerful video editing solution built with Python and PyQt6")
 
+class TimelineBenchmark:
+    # Headless stress test of the timeline view with synthetic clips. Every
+    # project size runs the same operations and reports the same keys, so
+    # reports from different builds or machines compare key by key.
+    VIEWPORT = (1600, 400)
+    TYPES = ['video', 'image', 'text', 'sticker', 'transition', 'audio']  # one per track
+    REPEATS = 5
+    SCROLL_STEPS = 200
+    DRAG_STEPS = 20
+
+    def __init__(self, sizes=None):
+        self.sizes = sizes or BENCHMARK_TIMELINE_SIZES
+        # Held for the benchmark's lifetime so it outlives every widget it times
+        self.app = QApplication.instance() or QApplication([])
+
+    @staticmethod
+    def stats(values):
+        values = np.array(values, dtype=np.float64)
+        return {
+            'count': int(len(values)),
+            'mean_ms': float(values.mean()),
+            'median_ms': float(np.median(values)),
+            'p95_ms': float(np.percentile(values, 95)),
+            'max_ms': float(values.max())
+        }
+
+    @staticmethod
+    def timed(function, *args):
+        start = time.perf_counter()
+        function(*args)
+        return (time.perf_counter() - start) * 1000
+
+    def synthetic_clips(self, count, first_id=1, start=0.0):
+        clips = []
+        for i in range(count):
+            track = i % len(self.TYPES)
+            clips.append({'id': first_id + i, 'type': self.TYPES[track],
+                          'track': track if track < len(self.TYPES) - 1 else 5,
+                          'start': start + (i // len(self.TYPES)) * 2.0, 'duration': 1.8,
+                          'name': f"Clip {first_id + i}"})
+        return clips
+
+    def run_size(self, count):
+        from PyQt6.QtTest import QTest  # only the benchmark drives the mouse
+        result = {}
+        timeline = TimelineWidget()
+        timeline.resize(*self.VIEWPORT)
+        timeline.show()
+        app = self.app
+        app.processEvents()
+        colors = lambda clip_type: Qt.GlobalColor.gray
+
+        start = time.perf_counter()
+        clips = ClipStore(self.synthetic_clips(count))
+        result['build_model_ms'] = (time.perf_counter() - start) * 1000
+        result['full_rebuild'] = self.stats([self.timed(lambda: (timeline.draw_timeline(), timeline.sync(clips, colors)))
+                                             for _ in range(self.REPEATS)])
+        result['draw_timeline'] = self.stats([self.timed(timeline.draw_timeline) for _ in range(self.REPEATS)])
+        timeline.sync(clips, colors)
+        result['noop_sync'] = self.stats([self.timed(timeline.sync, clips, colors) for _ in range(self.REPEATS)])
+
+        # Clips added one at a time at the visible start, as imports do
+        view_start = timeline.mapToScene(0, 0).x() / TIMELINE_SCALE
+        added = []
+        for clip in self.synthetic_clips(100, first_id=count + 1, start=view_start):
+            start = time.perf_counter()
+            clips.add(clip)
+            timeline.clip_added(clip)
+            added.append((time.perf_counter() - start) * 1000)
+        result['clip_added'] = self.stats(added)
+        app.processEvents()
+
+        # Scroll across the whole scene, painting every step
+        scroll = timeline.horizontalScrollBar()
+        span = scroll.maximum() - scroll.minimum()
+        frames = []
+        for step in range(self.SCROLL_STEPS + 1):
+            start = time.perf_counter()
+            scroll.setValue(scroll.minimum() + span * step // self.SCROLL_STEPS)
+            timeline.viewport().repaint()
+            frames.append((time.perf_counter() - start) * 1000)
+        result['scroll'] = self.stats(frames)
+        result['zoom_to_fit_ms'] = self.timed(lambda: (timeline.zoom_to_fit(), timeline.viewport().repaint()))
+        timeline.set_zoom(1.0)
+        scroll.setValue(scroll.minimum() + span // 2)
+        app.processEvents()
+
+        # Rubber band style selection of everything in view
+        area = QPainterPath()
+        area.addRect(timeline.mapToScene(timeline.viewport().rect()).boundingRect())
+        start = time.perf_counter()
+        timeline.scene.setSelectionArea(area)
+        result['select_visible_ms'] = (time.perf_counter() - start) * 1000
+        selected = [item for item in timeline.scene.selectedItems() if isinstance(item, TimelineClip)]
+        result['selected_clips'] = len(selected)
+
+        # Drag the selection by mouse, committing the gesture to the model
+        def commit(changes):
+            for clip_id, clip_start, duration in changes:
+                clip = clips.get(clip_id)
+                clip['start'] = clip_start
+                clip['duration'] = duration
+                clips.update(clip)
+                timeline.clip_changed(clip)
+        timeline.clips_edited.connect(commit)
+        viewport = timeline.viewport()
+        result['drag_commit_ms'] = None  # stays null when nothing was in view to drag
+        result['drag_move'] = None
+        if selected:
+            item = min(selected, key=lambda item: abs(item.sceneBoundingRect().center().x() -
+                                                      timeline.mapToScene(viewport.rect().center()).x()))
+            point = timeline.mapFromScene(item.sceneBoundingRect().center())
+            QTest.mousePress(viewport, Qt.MouseButton.LeftButton, Qt.KeyboardModifier.ControlModifier, point)
+            moves = []
+            for step in range(1, self.DRAG_STEPS + 1):
+                start = time.perf_counter()
+                QTest.mouseMove(viewport, point + QPoint(3 * step, 0))
+                viewport.repaint()
+                moves.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            QTest.mouseRelease(viewport, Qt.MouseButton.LeftButton, Qt.KeyboardModifier.ControlModifier,
+                               point + QPoint(3 * self.DRAG_STEPS, 0))
+            result['drag_commit_ms'] = (time.perf_counter() - start) * 1000
+            result['drag_move'] = self.stats(moves)
+        result['scene_items'] = len(timeline.scene.items())
+        # Destroy the view now rather than at exit, when its scene may already be gone
+        timeline.horizontalScrollBar().valueChanged.disconnect(timeline.scrolled)
+        timeline.close()
+        timeline.deleteLater()
+        app.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+        return result
+
+    def run(self, report_path=None):
+        report = {
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'platform': {
+                'python': sys.version.split()[0],
+                'qt': QT_VERSION_STR,
+                'qpa': self.app.platformName(),
+                'machine': f"{os.uname().sysname} {os.uname().machine}" if hasattr(os, 'uname') else sys.platform
+            },
+            'viewport': list(self.VIEWPORT),
+            'results': {str(count): self.run_size(count) for count in self.sizes}
+        }
+        if report_path:
+            with open(report_path, 'w') as f:
+                json.dump(report, f, indent=2)
+        return report
+
+    @staticmethod
+    def flatten(results):
+        # {"10000": {"scroll": {"p95_ms": 2.1}}} -> {"10000 scroll.p95_ms": 2.1}
+        flat = {}
+        for size, metrics in results.items():
+            for name, value in metrics.items():
+                if value is None:
+                    continue  # not measured in this run
+                if isinstance(value, dict):
+                    for key, number in value.items():
+                        if key.endswith('_ms'):
+                            flat[f"{size} {name}.{key}"] = number
+                elif name.endswith('_ms'):
+                    flat[f"{size} {name}"] = value
+        return flat
+
+    def summary(self, report, baseline=None):
+        current = self.flatten(report['results'])
+        previous = self.flatten(baseline['results']) if baseline else {}
+        lines = []
+        for key, value in current.items():
+            line = f"{key:40s} {value:10.2f} ms"
+            if key in previous and previous[key] > 0:
+                line += f"   {(value / previous[key] - 1) * 100:+6.1f}% vs {previous[key]:.2f}"
+            lines.append(line)
+        return "\n".join(lines)
+
+def load_project_file(file_path):
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    settings = data.get('settings', {
+        "fps": DEFAULT_FPS,
+        "resolution": DEFAULT_RESOLUTION,
+        "background": "#000000"
+    })
+    return data.get('clips', []), settings
+
+def run_cli(argv):
+    parser = argparse.ArgumentParser(prog="PyCut", description="PyCut Pro command line tools")
+    parser.add_argument("--estimate", metavar="PROJECT",
+                        help="print the export time and scratch disk estimate for a .pcp project")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="run the export calibration benchmark for this machine")
+    parser.add_argument("--benchmark-timeline", metavar="REPORT",
+                        help="time the timeline view with synthetic projects (headless) and write a JSON report")
+    parser.add_argument("--sizes", default=",".join(map(str, BENCHMARK_TIMELINE_SIZES)),
+                        help="comma separated clip counts for --benchmark-timeline")
+    parser.add_argument("--baseline", metavar="REPORT",
+                        help="earlier --benchmark-timeline report to compare against")
+    args = parser.parse_args(argv)
+    
+    if args.benchmark_timeline:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        benchmark = TimelineBenchmark([int(size) for size in args.sizes.split(",")])
+        report = benchmark.run(args.benchmark_timeline)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        print(benchmark.summary(report, baseline))
+        print(f"Report written to {args.benchmark_timeline}")
+    
+    estimator = ExportEstimator()
+    if args.calibrate:
+        rate = estimator.calibrate()
+        print(f"Calibration complete: {rate * 1000:.2f} ms per megapixel")
+    if args.estimate:
+        clips, settings = load_project_file(args.estimate)
+        estimate = estimator.estimate(clips, settings)
+        print(estimator.summary(estimate))
+        print(f"Free scratch space: {format_bytes(shutil.disk_usage(tempfile.gettempdir()).free)}")
+    return 0
+
 if __name__ == "__main__":
+    if any(arg in ("--estimate", "--calibrate", "--benchmark-timeline", "-h", "--help") for arg in sys.argv[1:]):
+        sys.exit(run_cli(sys.argv[1:]))
+    
     app = QApplication(sys.argv)
     app.setStyle(QStyleFactory.create("Fusion"))
     